@@ -0,0 +1 @@
+# Benchmarks for the School Management System API
@@ -0,0 +1,70 @@
+"""
+Compression savings and CPU cost per endpoint payload
+
+For each payload (contacts page, testimonials feed, stats) reports the
+compressed size and per-response CPU time for gzip and brotli at a few
+levels, plus the cost of serving a precompressed cached entry.
+
+Usage: python benchmarks/bench_compression.py --iterations 200
+"""
+import argparse
+import gzip
+import timeit
+
+import common  # noqa: F401  (sets up sys.path)
+from bench_lean_reads import stored_documents
+from cache import CachedPayload
+from compression import brotli
+from models import SchoolStats, SchoolTestimonial
+from serialization import api_envelope, dumps
+
+
+def payloads() -> dict:
+    testimonials = [
+        SchoolTestimonial(
+            text="EduManage has completely transformed how we handle student records and parent communication.",
+            author=f"Author {i}", role="Principal", school=f"School {i}"
+        ).model_dump()
+        for i in range(6)
+    ]
+    return {
+        "contacts": dumps(api_envelope({
+            "submissions": stored_documents(100),
+            "pagination": {"page": 1, "limit": 100, "total": 10000, "pages": 100}
+        })),
+        "testimonials": dumps(api_envelope(testimonials)),
+        "stats": dumps(api_envelope(SchoolStats().model_dump()))
+    }
+
+
+def codecs() -> dict:
+    available = {f"gzip-{level}": (lambda body, level=level: gzip.compress(body, compresslevel=level, mtime=0))
+                 for level in (1, 6, 9)}
+    if brotli is not None:
+        for quality in (1, 4, 11):
+            available[f"br-{quality}"] = lambda body, quality=quality: brotli.compress(body, quality=quality)
+    return available
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'endpoint':13s} {'codec':8s} {'raw':>8s} {'encoded':>8s} {'saved':>7s} {'cpu/resp':>10s}")
+    for endpoint, body in payloads().items():
+        for name, codec in codecs().items():
+            encoded = codec(body)
+            cpu_ms = timeit.timeit(lambda: codec(body), number=args.iterations) / args.iterations * 1000
+            saved = 1 - len(encoded) / len(body)
+            print(f"{endpoint:13s} {name:8s} {len(body):8d} {len(encoded):8d} {saved:6.1%} {cpu_ms:8.3f}ms")
+
+        # A cached entry compresses once; later hits only look up the stored bytes
+        payload = CachedPayload(body=body)
+        payload.compressed("gzip")
+        hit_us = timeit.timeit(lambda: payload.compressed("gzip"), number=args.iterations * 100) / (args.iterations * 100) * 1e6
+        print(f"{endpoint:13s} {'cached':8s} {'':8s} {'':8s} {'':7s} {hit_us:8.3f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Contact ingest throughput: POST /api/contacts/ per row vs POST /api/contacts/bulk
+
+Usage: python benchmarks/bench_contact_ingest.py --rows 5000 --concurrency 20
+"""
+import argparse
+import asyncio
+import json
+
+from common import Timer, app_client, reset_idempotency, sample_contact
+
+
+async def run_single(client, rows: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def submit(i):
+        async with semaphore:
+            response = await client.post("/api/contacts/", json=sample_contact(i))
+            response.raise_for_status()
+
+    with Timer() as timer:
+        await asyncio.gather(*(submit(i) for i in range(rows)))
+    return timer.elapsed
+
+
+async def run_bulk(client, rows: int, batch: int, ndjson: bool) -> float:
+    with Timer() as timer:
+        for start in range(0, rows, batch):
+            payload = [sample_contact(i) for i in range(start, min(start + batch, rows))]
+            if ndjson:
+                response = await client.post(
+                    "/api/contacts/bulk",
+                    content="\n".join(json.dumps(row) for row in payload),
+                    headers={"content-type": "application/x-ndjson"}
+                )
+            else:
+                response = await client.post("/api/contacts/bulk", json=payload)
+            response.raise_for_status()
+    return timer.elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--batch", type=int, default=1000, help="Rows per bulk request")
+    args = parser.parse_args()
+
+    async with app_client() as client:
+        from database import get_database
+        db = await get_database()
+
+        results = {}
+        for name, run in (
+            ("single", lambda: run_single(client, args.rows, args.concurrency)),
+            ("bulk_json", lambda: run_bulk(client, args.rows, args.batch, ndjson=False)),
+            ("bulk_ndjson", lambda: run_bulk(client, args.rows, args.batch, ndjson=True)),
+        ):
+            await db.contact_submissions.delete_many({})
+            # Earlier runs stored responses for these payloads; replays would skip the writes
+            await reset_idempotency(db)
+            elapsed = await run()
+            results[name] = args.rows / elapsed
+            print(f"{name:12s} {args.rows} rows in {elapsed:.2f}s -> {results[name]:,.0f} rows/s")
+
+        await db.contact_submissions.delete_many({})
+        print(f"bulk speedup: {results['bulk_json'] / results['single']:.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+"""
+Response encoding cost: FastAPI's JSONResponse vs FastJSONResponse
+
+Payloads mirror the contacts listing, testimonials feed and stats
+endpoints. "render" encodes the already JSON-compatible content that
+FastAPI hands to the response class; "direct" encodes the pydantic
+envelope itself (jsonable_encoder + json vs dumps).
+
+Usage: python benchmarks/bench_json_encoding.py --iterations 2000
+"""
+import argparse
+import timeit
+
+import common  # noqa: F401  (sets up sys.path)
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from bench_lean_reads import stored_documents
+from models import (
+    APIResponse, ContactSubmission, SchoolStats, SchoolTestimonial, StatsResponse, TestimonialsResponse
+)
+from serialization import FastJSONResponse, orjson
+
+
+def payloads() -> dict:
+    contacts = [ContactSubmission(**doc) for doc in stored_documents(100)]
+    testimonials = [
+        SchoolTestimonial(text="A wonderful platform for our teachers.", author=f"Author {i}",
+                          role="Principal", school=f"School {i}")
+        for i in range(6)
+    ]
+    return {
+        "contacts": APIResponse(success=True, data={
+            "submissions": [contact.model_dump() for contact in contacts],
+            "pagination": {"page": 1, "limit": 100, "total": 10000, "pages": 100}
+        }),
+        "testimonials": TestimonialsResponse(success=True, data=testimonials),
+        "stats": StatsResponse(success=True, data=SchoolStats())
+    }
+
+
+def per_call_ms(fn, iterations: int) -> float:
+    return timeit.timeit(fn, number=iterations) / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f"encoder: {'orjson' if orjson else 'stdlib json'}")
+    print(f"{'endpoint':14s} {'mode':7s} {'JSONResponse':>13s} {'FastJSON':>10s} {'speedup':>8s}")
+    for endpoint, model in payloads().items():
+        content = model.model_dump(mode="json")
+        cases = {
+            "render": (lambda: JSONResponse(content), lambda: FastJSONResponse(content)),
+            "direct": (lambda: JSONResponse(jsonable_encoder(model)), lambda: FastJSONResponse(model)),
+        }
+        for mode, (baseline, fast) in cases.items():
+            base_ms = per_call_ms(baseline, args.iterations)
+            fast_ms = per_call_ms(fast, args.iterations)
+            print(f"{endpoint:14s} {mode:7s} {base_ms:11.3f}ms {fast_ms:8.3f}ms {base_ms / fast_ms:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+CPU cost of one GET /api/contacts/ page: pydantic round trip vs lean path
+
+The legacy path builds ContactSubmission models, dumps them, wraps them
+in APIResponse, re-validates for the response_model and encodes with
+FastAPI's jsonable_encoder. The lean path serializes the projected
+documents directly.
+
+Usage: python benchmarks/bench_lean_reads.py --rows 100 --iterations 2000
+"""
+import argparse
+import timeit
+import uuid
+from datetime import datetime, timedelta
+
+import common  # noqa: F401  (sets up sys.path)
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from models import APIResponse, ContactSubmission
+from serialization import api_envelope, dumps, orjson
+
+
+def stored_documents(rows: int) -> list:
+    now = datetime.utcnow().replace(microsecond=0)
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "name": f"Parent {i}",
+            "email": f"parent{i}@example.com",
+            "school": f"School {i % 20}",
+            "phone": "+1 (555) 010-0000",
+            "message": "Could you tell us more about the attendance module? " * 3,
+            "status": "new",
+            "created_at": now - timedelta(minutes=i),
+            "updated_at": now - timedelta(minutes=i)
+        }
+        for i in range(rows)
+    ]
+
+
+def legacy_page(documents: list, pagination: dict) -> bytes:
+    contact_list = [ContactSubmission(**doc) for doc in documents]
+    response = APIResponse(
+        success=True,
+        data={"submissions": [sub.model_dump() for sub in contact_list], "pagination": pagination}
+    )
+    validated = APIResponse.model_validate(response.model_dump())
+    return JSONResponse(jsonable_encoder(validated)).body
+
+
+def lean_page(documents: list, pagination: dict) -> bytes:
+    return dumps(api_envelope({"submissions": documents, "pagination": pagination}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=1000)
+    args = parser.parse_args()
+
+    documents = stored_documents(args.rows)
+    pagination = {"page": 1, "limit": args.rows, "total": 10000, "pages": 10000 // args.rows}
+
+    print(f"encoder: {'orjson' if orjson else 'stdlib json'}, {args.rows} rows per page")
+    results = {}
+    for name, fn in (("legacy", legacy_page), ("lean", lean_page)):
+        elapsed = timeit.timeit(lambda: fn(documents, pagination), number=args.iterations)
+        results[name] = elapsed / args.iterations * 1000
+        print(f"{name:7s} {results[name]:.3f} ms CPU per request")
+    print(f"saved   {results['legacy'] - results['lean']:.3f} ms per request "
+          f"({results['legacy'] / results['lean']:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
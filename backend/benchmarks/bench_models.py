@@ -0,0 +1,103 @@
+"""
+Contact model throughput: legacy v1-style validators vs the current models
+
+"legacy" reproduces the previous models (validators that import re and
+recompile their pattern per call, and a create -> dict -> ContactSubmission
+round trip that validates every field twice). "current" validates the
+request once and converts it with to_submission(). Both produce the
+stored document.
+
+Usage: python benchmarks/bench_models.py --iterations 20000
+"""
+import argparse
+import itertools
+import timeit
+import uuid
+import warnings
+from datetime import datetime
+from typing import Optional
+
+import common  # noqa: F401  (sets up sys.path)
+from common import sample_contact
+from pydantic import BaseModel, Field
+
+from models import ContactStatus, ContactSubmissionCreate
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore")
+    from pydantic import validator
+
+    class LegacyContactSubmission(BaseModel):
+        id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+        name: str = Field(..., min_length=1, max_length=100)
+        email: str = Field(..., min_length=5, max_length=100)
+        school: Optional[str] = Field(None, max_length=100)
+        phone: Optional[str] = Field(None, max_length=20)
+        message: str = Field(..., min_length=1, max_length=1000)
+        status: ContactStatus = Field(default=ContactStatus.NEW)
+        created_at: datetime = Field(default_factory=datetime.utcnow)
+        updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+        @validator('email')
+        def validate_email(cls, v):
+            import re
+            pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+            if not re.match(pattern, v):
+                raise ValueError('Invalid email format')
+            return v.lower()
+
+        @validator('phone')
+        def validate_phone(cls, v):
+            if v is None:
+                return v
+            import re
+            digits_only = re.sub(r'[^\d]', '', v)
+            if len(digits_only) < 10:
+                raise ValueError('Phone number must have at least 10 digits')
+            return v
+
+    class LegacyContactSubmissionCreate(BaseModel):
+        name: str = Field(..., min_length=1, max_length=100)
+        email: str = Field(..., min_length=5, max_length=100)
+        school: Optional[str] = Field(None, max_length=100)
+        phone: Optional[str] = Field(None, max_length=20)
+        message: str = Field(..., min_length=1, max_length=1000)
+
+        @validator('email')
+        def validate_email(cls, v):
+            import re
+            pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+            if not re.match(pattern, v):
+                raise ValueError('Invalid email format')
+            return v.lower()
+
+
+def legacy(payload: dict) -> dict:
+    contact_data = LegacyContactSubmissionCreate(**payload)
+    return LegacyContactSubmission(**contact_data.model_dump()).model_dump()
+
+
+def current(payload: dict) -> dict:
+    return ContactSubmissionCreate(**payload).to_submission().model_dump()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    payloads = [sample_contact(i) for i in range(100)]
+    assert legacy(payloads[0]).keys() == current(payloads[0]).keys()
+
+    print(f"{'path':8s} {'per call':>10s} {'validations/s':>14s}")
+    rates = {}
+    for name, fn in (("legacy", legacy), ("current", current)):
+        rows = itertools.cycle(payloads)
+        seconds = timeit.timeit(lambda: fn(next(rows)), number=args.iterations)
+        rates[name] = args.iterations / seconds
+        print(f"{name:8s} {seconds / args.iterations * 1e6:8.2f}us {rates[name]:14,.0f}")
+    print(f"speedup: {rates['current'] / rates['legacy']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
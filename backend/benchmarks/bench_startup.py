@@ -0,0 +1,93 @@
+"""
+Cold start: time to import the app, to start serving and to become ready
+
+Each run is a fresh interpreter so imports are cold. "serving" is when
+the lifespan hands control to the server (liveness); "ready" is when the
+startup warm-up (ping + index check) has finished. Scenarios cover both
+DB_SETUP_ON_STARTUP modes against an empty database ("fresh", every
+index is built) and an existing one ("existing", the list_indexes check
+skips the builds).
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --mock     # in-memory MongoDB (fresh only)
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BENCH_FILE = os.path.abspath(__file__)
+
+
+async def child(mock: bool, fresh: bool):
+    """Measure one startup inside this (fresh) interpreter and print JSON"""
+    started = time.perf_counter()
+    import common  # noqa: F401  (sets up sys.path and the benchmark database)
+    import database
+
+    if mock:
+        from mongomock_motor import AsyncMongoMockClient
+        database.AsyncIOMotorClient = lambda *args, **kwargs: AsyncMongoMockClient()
+    elif fresh:
+        await database.connect_to_mongo(ping=False)
+        await database.client.drop_database(os.environ["DB_NAME"])
+        await database.close_mongo_connection()
+
+    import_started = time.perf_counter()
+    from server import app
+    from health import startup
+    imported = time.perf_counter()
+
+    async with app.router.lifespan_context(app):
+        serving = time.perf_counter()
+        while not startup.ready:
+            if startup.error:
+                raise SystemExit(f"warm-up failed: {startup.error}")
+            await asyncio.sleep(0.001)
+        ready = time.perf_counter()
+
+    print(json.dumps({
+        "import_server_ms": (imported - import_started) * 1000,
+        "serving_ms": (serving - started) * 1000,
+        "ready_ms": (ready - started) * 1000
+    }))
+
+
+def run_child(mode: str, mock: bool, fresh: bool) -> dict:
+    env = {**os.environ, "DB_SETUP_ON_STARTUP": mode, "CACHE_INVALIDATION_MODE": "off"}
+    args = [sys.executable, BENCH_FILE, "--child"] + (["--mock"] if mock else []) + (["--fresh"] if fresh else [])
+    output = subprocess.run(args, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--mock", action="store_true", help="Use an in-memory mongomock-motor client")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--fresh", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        asyncio.run(child(args.mock, args.fresh))
+        return
+
+    states = ["fresh"] if args.mock else ["fresh", "existing"]
+    print(f"{'mode':11s} {'database':9s} {'import':>9s} {'serving':>9s} {'ready':>9s}  (median of {args.runs})")
+    for mode in ("blocking", "background"):
+        for state in states:
+            runs = [run_child(mode, args.mock, state == "fresh") for _ in range(args.runs)]
+            median = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+            print(
+                f"{mode:11s} {state:9s} {median['import_server_ms']:7.1f}ms "
+                f"{median['serving_ms']:7.1f}ms {median['ready_ms']:7.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Shared helpers for the benchmark scripts
+
+Benchmarks run the FastAPI app in-process through httpx and use the
+MongoDB configured in backend/.env, with a separate database so
+benchmark rows never mix with real data. Passing mock=True to
+app_client swaps in an in-memory mongomock-motor client instead
+(pip install mongomock-motor); its numbers measure the app, not MongoDB.
+"""
+import os
+import sys
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+load_dotenv(BACKEND_DIR / '.env')
+os.environ["DB_NAME"] = os.environ.get("BENCH_DB_NAME", "school_cms_bench")
+# Benchmarks drive every request from one address; measure the app, not the limiter
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import httpx
+
+
+@asynccontextmanager
+async def app_client(mock: bool = False):
+    """Connect to MongoDB and yield an httpx client bound to the app"""
+    import database
+    from database import connect_to_mongo, close_mongo_connection, setup_database
+    from server import app
+
+    if mock:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            raise SystemExit("--mock needs mongomock-motor: pip install mongomock-motor")
+        database.AsyncIOMotorClient = lambda *args, **kwargs: AsyncMongoMockClient()
+
+    await connect_to_mongo()
+    await setup_database()
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            yield client
+    finally:
+        await close_mongo_connection()
+
+
+async def reset_idempotency(db):
+    """Forget stored idempotent responses so repeated payloads are written again"""
+    from idempotency import IDEMPOTENCY_COLLECTION, idempotency_store
+
+    await db[IDEMPOTENCY_COLLECTION].delete_many({})
+    idempotency_store.clear()
+
+
+def sample_contact(i: int) -> dict:
+    """Build a valid contact form payload"""
+    return {
+        "name": f"Bench User {i}",
+        "email": f"bench{i}@example.com",
+        "school": f"Bench School {i % 50}",
+        "phone": "+1 (555) 010-0000",
+        "message": "We would like a demo of the attendance and grading modules."
+    }
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(q * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class Timer:
+    """Context manager measuring wall-clock seconds"""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
@@ -0,0 +1,155 @@
+"""
+Local load test for the School Management System API
+
+Boots the app in-process, seeds the database at each requested size
+(the seed_data.py testimonials and stats plus generated contacts), then
+drives concurrent async load at every scenario and reports RPS and
+p50/p95/p99 latency. Results are written as JSON, tagged with the git
+commit, so runs can be compared across commits.
+
+Usage:
+    python benchmarks/loadtest.py --sizes 1000,10000 --requests 500 --concurrency 20
+    python benchmarks/loadtest.py --mock            # in-memory MongoDB
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import time
+from datetime import datetime
+from pathlib import Path
+
+from common import BACKEND_DIR, app_client, percentile, reset_idempotency, sample_contact
+
+RESULTS_DIR = BACKEND_DIR / "benchmarks" / "results"
+PAGE_LIMIT = 50
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def seed(size: int):
+    """Reset the benchmark database to `size` contacts plus the seed fixtures"""
+    from cache import caches
+    from counters import recompute_counters
+    from database import get_database
+    from models import SchoolStats, SchoolTestimonial
+    from seed_data import INITIAL_TESTIMONIALS, bulk_insert, generate_contacts
+
+    db = await get_database()
+    for collection in ("contact_submissions", "testimonials", "school_stats", "school_names"):
+        await db[collection].delete_many({})
+    # create_contact sends the same payloads at every size; they must not be replays
+    await reset_idempotency(db)
+
+    await db.testimonials.insert_many([SchoolTestimonial(**t).model_dump() for t in INITIAL_TESTIMONIALS])
+    await db.school_stats.insert_one(SchoolStats().model_dump(exclude={"average_rating"}))
+
+    await bulk_insert(db.contact_submissions, generate_contacts(size, seed=size))
+
+    await recompute_counters()
+    for cache in caches.values():
+        cache.invalidate()
+
+
+def scenarios(size: int) -> dict:
+    """Request builders keyed by scenario name"""
+    last_page = max((size + PAGE_LIMIT - 1) // PAGE_LIMIT, 1)
+    depths = sorted({1, min(10, last_page), max(last_page // 2, 1), last_page})
+    built = {
+        "create_contact": lambda client, i: client.post("/api/contacts/", json=sample_contact(10_000_000 + i)),
+        "testimonials": lambda client, i: client.get("/api/testimonials/"),
+        "stats": lambda client, i: client.get("/api/stats/"),
+    }
+    for depth in depths:
+        built[f"list_contacts_page_{depth}"] = (
+            lambda client, i, depth=depth: client.get(f"/api/contacts/?limit={PAGE_LIMIT}&page={depth}")
+        )
+    return built
+
+
+async def drive(client, request, total: int, concurrency: int) -> dict:
+    """Run `total` requests with `concurrency` workers and summarize latency"""
+    latencies = []
+    errors = 0
+    issued = 0
+
+    async def worker():
+        nonlocal errors, issued
+        while issued < total:
+            index = issued
+            issued += 1
+            start = time.perf_counter()
+            try:
+                response = await request(client, index)
+                if response.status_code >= 400:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rps": round(total / elapsed, 1),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3)
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000", help="Comma-separated contact counts to seed")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--mock", action="store_true", help="Use an in-memory mongomock-motor client")
+    parser.add_argument("--output", type=Path, help="JSON results path (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    commit = git_commit()
+    report = {
+        "commit": commit,
+        "timestamp": datetime.utcnow().isoformat(),
+        "mock": args.mock,
+        "concurrency": args.concurrency,
+        "requests_per_scenario": args.requests,
+        "results": []
+    }
+
+    async with app_client(mock=args.mock) as client:
+        for size in sizes:
+            print(f"\nSeeding {size} contacts...")
+            await seed(size)
+            print(f"{'scenario':26s} {'rps':>9s} {'p50':>9s} {'p95':>9s} {'p99':>9s} {'errors':>7s}")
+            for name, request in scenarios(size).items():
+                result = await drive(client, request, args.requests, args.concurrency)
+                report["results"].append({"size": size, "scenario": name, **result})
+                print(
+                    f"{name:26s} {result['rps']:9.1f} {result['p50_ms']:7.2f}ms "
+                    f"{result['p95_ms']:7.2f}ms {result['p99_ms']:7.2f}ms {result['errors']:7d}"
+                )
+
+    output = args.output or RESULTS_DIR / f"{time.strftime('%Y%m%dT%H%M%S')}-{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,219 @@
+"""
+In-process caches for pre-serialized API payloads
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Hashable, Optional
+
+from compression import compress
+
+logger = logging.getLogger(__name__)
+
+# Registry of every cache in this process, keyed by name
+caches: Dict[str, "ResponseCache"] = {}
+
+
+@dataclass
+class CachedPayload:
+    """Serialized response body kept in a cache"""
+    body: bytes
+    etag: Optional[str] = None
+    created_at: float = field(default_factory=time.monotonic)
+    # False for a payload that may mix states across a concurrent write: served once, never kept
+    cacheable: bool = True
+    # Compressed bodies by content encoding, filled on first use
+    _encoded: Dict[str, bytes] = field(default_factory=dict, repr=False, compare=False)
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.created_at
+
+    def compressed(self, encoding: str) -> bytes:
+        """Body compressed with `encoding`, computed once per entry"""
+        body = self._encoded.get(encoding)
+        if body is None:
+            body = self._encoded[encoding] = compress(self.body, encoding)
+        return body
+
+
+class ResponseCache:
+    """TTL cache with single-flight loading and hit/miss counters
+
+    With a stale_ttl the ttl becomes a soft limit: entries older than ttl
+    are still served immediately while one background task refreshes them,
+    and if a load fails the last good payload is served until it is
+    stale_ttl old.
+
+    With max_entries, expired entries and then the oldest loaded ones are
+    evicted once the cache grows past that many keys.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: float,
+        stale_ttl: Optional[float] = None,
+        max_entries: Optional[int] = None
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.stale_hits = 0
+        self.stale_on_error = 0
+        self.refresh_failures = 0
+        self.evictions = 0
+        self._entries: Dict[Hashable, CachedPayload] = {}
+        # Last good payloads evicted by invalidate(), kept only as an error fallback
+        self._fallbacks: Dict[Hashable, CachedPayload] = {}
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self._generation = 0
+        caches[name] = self
+
+    def get(self, key: Hashable) -> Optional[CachedPayload]:
+        """Return a fresh entry without loading or touching counters"""
+        entry = self._entries.get(key)
+        if entry is None or entry.age >= self.ttl:
+            return None
+        return entry
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[CachedPayload]]
+    ) -> CachedPayload:
+        """Return a cached entry, running at most one loader per key"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.age < self.ttl:
+                self.hits += 1
+                return entry
+            if self.stale_ttl and entry.age < self.stale_ttl:
+                # Serve the old payload now and refresh it in the background
+                self.stale_hits += 1
+                if key not in self._inflight:
+                    task = self._start_load(key, loader)
+                    task.add_done_callback(self._refresh_done)
+                return entry
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = self._start_load(key, loader)
+        else:
+            self.coalesced += 1
+
+        try:
+            # Shield the shared load so one cancelled request doesn't fail the others
+            return await asyncio.shield(task)
+        except Exception:
+            fallback = self._last_good(key)
+            if fallback is None:
+                raise
+            self.stale_on_error += 1
+            logger.warning(f"Cache '{self.name}' load failed; serving a payload {fallback.age:.0f}s old")
+            return fallback
+
+    def _start_load(self, key: Hashable, loader: Callable[[], Awaitable[CachedPayload]]) -> asyncio.Task:
+        task = asyncio.ensure_future(self._load(key, loader))
+        self._inflight[key] = task
+        return task
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[CachedPayload]]) -> CachedPayload:
+        generation = self._generation
+        try:
+            entry = await loader()
+            # Drop results that raced with an invalidation
+            if generation == self._generation and entry.cacheable:
+                # Re-insert so dict order is load order for eviction
+                self._entries.pop(key, None)
+                self._entries[key] = entry
+                self._fallbacks.pop(key, None)
+                self._evict(self._entries)
+            return entry
+        finally:
+            if self._inflight.get(key) is asyncio.current_task():
+                del self._inflight[key]
+
+    def _evict(self, entries: Dict[Hashable, CachedPayload]):
+        """Trim `entries` to max_entries, expired entries first, then oldest first"""
+        if self.max_entries is None or len(entries) <= self.max_entries:
+            return
+        limit = self.stale_ttl or self.ttl
+        for key in [key for key, entry in entries.items() if entry.age >= limit]:
+            del entries[key]
+            self.evictions += 1
+        while len(entries) > self.max_entries:
+            del entries[next(iter(entries))]
+            self.evictions += 1
+
+    def _refresh_done(self, task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            self.refresh_failures += 1
+            logger.warning(f"Cache '{self.name}' background refresh failed: {task.exception()}")
+
+    def _last_good(self, key: Hashable) -> Optional[CachedPayload]:
+        """Newest payload for `key` still inside the hard TTL, if any"""
+        if not self.stale_ttl:
+            return None
+        for entry in (self._entries.get(key), self._fallbacks.get(key)):
+            if entry is not None and entry.age < self.stale_ttl:
+                return entry
+        self._fallbacks.pop(key, None)
+        return None
+
+    def freshness_headers(self, key: Hashable, payload: CachedPayload) -> Dict[str, str]:
+        """Age and X-Cache-Status headers describing how fresh a served payload is"""
+        fresh = payload.age < self.ttl and self._entries.get(key) is payload
+        return {"Age": str(int(payload.age)), "X-Cache-Status": "fresh" if fresh else "stale"}
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Evict one key, or every entry when no key is given"""
+        self._generation += 1
+        if key is None:
+            if self.stale_ttl:
+                self._fallbacks.update(self._entries)
+                self._evict(self._fallbacks)
+            self._entries.clear()
+            self._inflight.clear()
+        else:
+            entry = self._entries.pop(key, None)
+            if entry is not None and self.stale_ttl:
+                self._fallbacks[key] = entry
+                self._evict(self._fallbacks)
+            self._inflight.pop(key, None)
+        logger.info(f"Cache '{self.name}' invalidated")
+
+    def snapshot(self) -> dict:
+        """Counters for monitoring the cache hit rate"""
+        lookups = self.hits + self.misses + self.coalesced + self.stale_hits
+        return {
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "stale_on_error": self.stale_on_error,
+            "refresh_failures": self.refresh_failures,
+            "hit_rate": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0
+        }
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
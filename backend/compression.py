@@ -0,0 +1,178 @@
+"""
+Response compression (brotli when available, otherwise gzip)
+
+CompressionMiddleware compresses responses above a size threshold.
+Cached payloads are compressed once per encoding and served with
+cached_response, which the middleware leaves untouched.
+"""
+import gzip
+import logging
+import zlib
+from typing import Optional
+
+from fastapi import Request, Response
+
+from config import env_bool, env_int
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSION_ENABLED = env_bool("COMPRESSION_ENABLED", True)
+COMPRESSION_MIN_SIZE = env_int("COMPRESSION_MIN_SIZE", 1024)
+GZIP_LEVEL = env_int("COMPRESSION_GZIP_LEVEL", 6)
+BROTLI_QUALITY = env_int("COMPRESSION_BROTLI_QUALITY", 4)
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def supported_encodings() -> tuple:
+    """Encodings this process can produce, most preferred first"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the best encoding the client accepts"""
+    if not COMPRESSION_ENABLED or not accept_encoding:
+        return None
+    accepted = set()
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding.strip())
+    for encoding in supported_encodings():
+        if encoding in accepted or "*" in accepted:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """Compress a complete body"""
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class StreamCompressor:
+    """Incremental compressor for streamed bodies"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def process(self, chunk: bytes) -> bytes:
+        # Flush each chunk so streamed rows reach the client promptly
+        if self.encoding == "br":
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+def cached_response(request: Request, payload, headers: Optional[dict] = None) -> Response:
+    """Serve a cached payload, reusing its stored compressed body"""
+    headers = dict(headers or {})
+    headers["Vary"] = "Accept-Encoding"
+    encoding = choose_encoding(request.headers.get("accept-encoding"))
+    if encoding and len(payload.body) >= COMPRESSION_MIN_SIZE:
+        headers["Content-Encoding"] = encoding
+        return Response(content=payload.compressed(encoding), media_type="application/json", headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses above COMPRESSION_MIN_SIZE"""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                headers = {name.lower(): value for name, value in message.get("headers", [])}
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                passthrough = (
+                    b"content-encoding" in headers
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                if not more_body:
+                    # Whole body in one message: compress only if it is worth it
+                    if len(body) < self.minimum_size:
+                        await send(start_message)
+                        await send(message)
+                        return
+                    compressed = compress(body, encoding)
+                    await send(self._compressed_start(start_message, encoding, len(compressed)))
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+
+                compressor = StreamCompressor(encoding)
+                await send(self._compressed_start(start_message, encoding, None))
+
+            chunk = compressor.process(body) if body else b""
+            if not more_body:
+                chunk += compressor.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+    @staticmethod
+    def _compressed_start(message, encoding: str, length: Optional[int]):
+        headers = [
+            (name, value) for name, value in message.get("headers", [])
+            if name.lower() not in (b"content-length", b"vary")
+        ]
+        headers.append((b"content-encoding", encoding.encode()))
+        headers.append((b"vary", b"Accept-Encoding"))
+        if length is not None:
+            headers.append((b"content-length", str(length).encode()))
+        return {**message, "headers": headers}
@@ -0,0 +1,35 @@
+"""
+Environment-driven settings helpers
+"""
+import os
+from typing import Optional
+
+TRUE_VALUES = {"1", "true", "yes", "on"}
+
+
+def env_str(name: str, default: Optional[str] = None) -> Optional[str]:
+    """Read a string setting from the environment"""
+    value = os.environ.get(name)
+    if value is None or value.strip() == "":
+        return default
+    return value.strip()
+
+
+def env_int(name: str, default: int) -> int:
+    """Read an integer setting from the environment"""
+    value = env_str(name)
+    return int(value) if value is not None else default
+
+
+def env_float(name: str, default: float) -> float:
+    """Read a float setting from the environment"""
+    value = env_str(name)
+    return float(value) if value is not None else default
+
+
+def env_bool(name: str, default: bool = False) -> bool:
+    """Read a boolean flag from the environment"""
+    value = env_str(name)
+    if value is None:
+        return default
+    return value.lower() in TRUE_VALUES
@@ -0,0 +1,212 @@
+"""
+Incrementally maintained counters on the school stats document
+
+Writes to contacts and testimonials apply atomic $inc deltas to the
+current school_stats document, so GET /api/stats stays a single document
+read. Collection versions (for ETags that every worker agrees on, and
+as a change signal for cache invalidation by polling) live in the
+collection_versions collection. Run this module to rebuild the
+counters from the source collections:
+
+    python counters.py
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict
+
+from database import get_database, get_read_database
+from models import ContactStatus, SchoolStats
+
+logger = logging.getLogger(__name__)
+
+COUNTER_FIELDS = {
+    "contacts_total",
+    "contacts_by_status",
+    "testimonials_total",
+    "testimonials_active",
+    "testimonial_rating_sum",
+    "average_rating"
+}
+
+# The stats document is the newest one by last_updated
+CURRENT_STATS_SORT = [("last_updated", -1)]
+
+COLLECTION_VERSIONS = "collection_versions"
+
+
+def stats_defaults(exclude=()) -> dict:
+    """Default SchoolStats fields for upserts, without counters or excluded keys"""
+    return {
+        key: value for key, value in SchoolStats().model_dump().items()
+        if key not in COUNTER_FIELDS and key not in exclude
+    }
+
+
+# Change stream $match for school_stats events other than counter-only updates,
+# so counter $incs (served within the stats TTL) never leave the server
+NON_COUNTER_CHANGES = {"$expr": {"$or": [
+    {"$ne": ["$operationType", "update"]},
+    {"$let": {
+        "vars": {"paths": {"$concatArrays": [
+            {"$map": {
+                "input": {"$objectToArray": {"$ifNull": ["$updateDescription.updatedFields", {}]}},
+                "as": "field",
+                "in": "$$field.k"
+            }},
+            {"$ifNull": ["$updateDescription.removedFields", []]}
+        ]}},
+        # An update counts unless every changed path is under a counter field
+        "in": {"$or": [
+            {"$eq": [{"$size": "$$paths"}, 0]},
+            {"$gt": [{"$size": {"$filter": {
+                "input": "$$paths",
+                "as": "path",
+                "cond": {"$eq": [
+                    {"$in": [{"$arrayElemAt": [{"$split": ["$$path", "."]}, 0]}, sorted(COUNTER_FIELDS)]},
+                    False
+                ]}
+            }}}, 0]}
+        ]}
+    }}
+]}}
+
+
+def with_derived_counters(stats_doc: dict) -> dict:
+    """Add values computed from the raw counters"""
+    active = stats_doc.get("testimonials_active", 0)
+    rating_sum = stats_doc.get("testimonial_rating_sum", 0)
+    stats_doc["average_rating"] = round(rating_sum / active, 2) if active > 0 else None
+    return stats_doc
+
+
+async def increment_counters(deltas: Dict[str, int]):
+    """Atomically apply counter deltas to the current stats document"""
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas:
+        return
+    try:
+        db = await get_database()
+        await db.school_stats.find_one_and_update(
+            {},
+            {"$inc": deltas, "$setOnInsert": stats_defaults()},
+            sort=CURRENT_STATS_SORT,
+            projection={"_id": 1},
+            upsert=True
+        )
+    except Exception as e:
+        # Counters can be rebuilt with recompute_counters, so never fail the write
+        logger.error(f"Failed to update stats counters: {str(e)}")
+
+
+async def record_contacts_created(count: int = 1):
+    await increment_counters({
+        "contacts_total": count,
+        f"contacts_by_status.{ContactStatus.NEW.value}": count
+    })
+
+
+async def record_contact_status_change(old_status: str, new_status: str):
+    await record_contact_status_changes({old_status: 1}, new_status)
+
+
+async def record_contact_status_changes(moved: Dict[str, int], new_status: str):
+    """Move counts from each previous status to the new one in a single $inc"""
+    new_status = ContactStatus(new_status).value
+    deltas: Dict[str, int] = {}
+    for old_status, count in moved.items():
+        old_status = ContactStatus(old_status).value
+        if old_status == new_status or not count:
+            continue
+        deltas[f"contacts_by_status.{old_status}"] = deltas.get(f"contacts_by_status.{old_status}", 0) - count
+        deltas[f"contacts_by_status.{new_status}"] = deltas.get(f"contacts_by_status.{new_status}", 0) + count
+    await increment_counters(deltas)
+
+
+async def record_testimonial_created(rating: int, is_active: bool = True):
+    await increment_counters({
+        "testimonials_total": 1,
+        "testimonials_active": 1 if is_active else 0,
+        "testimonial_rating_sum": rating if is_active else 0
+    })
+
+
+async def record_testimonial_toggled(rating: int, is_active: bool):
+    sign = 1 if is_active else -1
+    await increment_counters({
+        "testimonials_active": sign,
+        "testimonial_rating_sum": sign * rating
+    })
+
+
+async def bump_collection_version(collection: str):
+    """Advance the shared version of `collection` after a write"""
+    # Not swallowed like the counters: a missed bump would keep stale ETags valid
+    db = await get_database()
+    await db[COLLECTION_VERSIONS].update_one(
+        {"_id": collection},
+        {"$inc": {"version": 1}, "$set": {"updated_at": datetime.utcnow()}},
+        upsert=True
+    )
+
+
+async def collection_version(collection: str) -> int:
+    """Current shared version of `collection` (0 before its first write)"""
+    db = await get_read_database()
+    document = await db[COLLECTION_VERSIONS].find_one({"_id": collection})
+    return document.get("version", 0) if document else 0
+
+
+async def recompute_counters() -> dict:
+    """Rebuild every counter from the contact and testimonial collections"""
+    db = await get_database()
+
+    contacts_by_status = {status.value: 0 for status in ContactStatus}
+    async for row in db.contact_submissions.aggregate([
+        {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+    ]):
+        contacts_by_status[row["_id"]] = row["count"]
+
+    testimonial_totals = await db.testimonials.aggregate([
+        {"$group": {
+            "_id": None,
+            "total": {"$sum": 1},
+            "active": {"$sum": {"$cond": ["$is_active", 1, 0]}},
+            "rating_sum": {"$sum": {"$cond": ["$is_active", "$rating", 0]}}
+        }}
+    ]).to_list(length=1)
+    testimonial_totals = testimonial_totals[0] if testimonial_totals else {}
+
+    counters = {
+        "contacts_total": sum(contacts_by_status.values()),
+        "contacts_by_status": contacts_by_status,
+        "testimonials_total": testimonial_totals.get("total", 0),
+        "testimonials_active": testimonial_totals.get("active", 0),
+        "testimonial_rating_sum": testimonial_totals.get("rating_sum", 0)
+    }
+    await db.school_stats.find_one_and_update(
+        {},
+        {"$set": counters, "$setOnInsert": stats_defaults()},
+        sort=CURRENT_STATS_SORT,
+        upsert=True
+    )
+    logger.info(f"Stats counters recomputed: {counters}")
+    return counters
+
+
+async def main():
+    from pathlib import Path
+    from dotenv import load_dotenv
+    from database import close_mongo_connection
+
+    load_dotenv(Path(__file__).parent / '.env')
+    try:
+        counters = await recompute_counters()
+        print(f"Recomputed stats counters: {counters}")
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
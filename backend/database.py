@@ -1,16 +1,156 @@
+import asyncio
 import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import IndexModel, monitoring
+from pymongo.read_preferences import read_pref_mode_from_name, make_read_preference
 import logging
 
+from config import env_float, env_str, env_int
+from metrics import mongo_command_listener
+
 logger = logging.getLogger(__name__)
 
 # Global database client
 client = None
 database = None
+read_database = None
+
+# Wait percentiles cover checkouts from this many seconds back, so an idle
+# process stops reporting a past burst once it has aged out
+POOL_WAIT_WINDOW_SECONDS = env_float("MONGO_POOL_WAIT_WINDOW_SECONDS", 60.0)
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Tracks connection pool checkout wait times for tuning"""
+
+    def __init__(self, window: int = 1024, window_seconds: float = POOL_WAIT_WINDOW_SECONDS):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.window_seconds = window_seconds
+        # (monotonic time, wait) for the most recent checkouts
+        self._recent_waits = deque(maxlen=window)
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.open_connections = 0
+        self.in_use = 0
+
+    # Motor runs pymongo calls on worker threads, so start times are per thread
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        wait = time.perf_counter() - getattr(self._local, "started", time.perf_counter())
+        with self._lock:
+            self.checkouts += 1
+            self.in_use += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self._recent_waits.append((time.monotonic(), wait))
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections -= 1
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def snapshot(self) -> dict:
+        """Checkout wait statistics in milliseconds"""
+        since = time.monotonic() - self.window_seconds
+        with self._lock:
+            recent = sorted(wait for at, wait in self._recent_waits if at >= since)
+            checkouts = self.checkouts
+            total_wait = self.total_wait
+            stats = {
+                "checkouts": checkouts,
+                "checkout_failures": self.checkout_failures,
+                "open_connections": self.open_connections,
+                "in_use": self.in_use,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+                "window_seconds": self.window_seconds,
+                "window_checkouts": len(recent)
+            }
+        stats["avg_wait_ms"] = round(total_wait / checkouts * 1000, 3) if checkouts else 0.0
+        for name, q in (("p50_wait_ms", 0.50), ("p99_wait_ms", 0.99)):
+            stats[name] = round(recent[min(int(len(recent) * q), len(recent) - 1)] * 1000, 3) if recent else 0.0
+        return stats
+
+pool_monitor = PoolMonitor()
 
-async def connect_to_mongo():
+def get_client_options() -> dict:
+    """Motor client options read from the environment"""
+    options = {
+        "maxPoolSize": env_int("MONGO_MAX_POOL_SIZE", 100),
+        "minPoolSize": env_int("MONGO_MIN_POOL_SIZE", 0),
+        "maxIdleTimeMS": env_int("MONGO_MAX_IDLE_TIME_MS", 0) or None,
+        "waitQueueTimeoutMS": env_int("MONGO_WAIT_QUEUE_TIMEOUT_MS", 0) or None,
+        "serverSelectionTimeoutMS": env_int("MONGO_SERVER_SELECTION_TIMEOUT_MS", 30000),
+        "connectTimeoutMS": env_int("MONGO_CONNECT_TIMEOUT_MS", 20000),
+        "readPreference": env_str("MONGO_READ_PREFERENCE", "primary"),
+        "event_listeners": [pool_monitor, mongo_command_listener]
+    }
+    
+    # Each uvicorn worker owns a client, so a total budget is split between them
+    total_pool_size = env_int("MONGO_TOTAL_POOL_SIZE", 0)
+    if total_pool_size and not env_str("MONGO_MAX_POOL_SIZE"):
+        workers = max(env_int("WEB_CONCURRENCY", 1), 1)
+        options["maxPoolSize"] = max(total_pool_size // workers, 1)
+    
+    # Wire compression, e.g. "zstd,snappy" (needs zstandard / python-snappy)
+    compressors = env_str("MONGO_COMPRESSORS")
+    if compressors:
+        options["compressors"] = compressors
+        options["zlibCompressionLevel"] = env_int("MONGO_ZLIB_COMPRESSION_LEVEL", -1)
+    
+    write_concern = env_str("MONGO_WRITE_CONCERN")
+    if write_concern:
+        options["w"] = int(write_concern) if write_concern.isdigit() else write_concern
+        journal = env_str("MONGO_WRITE_JOURNAL")
+        if journal:
+            options["journal"] = journal.lower() == "true"
+    
+    return {key: value for key, value in options.items() if value is not None}
+
+def get_read_heavy_preference():
+    """Read preference for cacheable public reads and admin listings"""
+    mode = env_str("MONGO_READ_HEAVY_PREFERENCE")
+    if not mode:
+        return None
+    max_staleness = env_int("MONGO_MAX_STALENESS_SECONDS", -1)
+    return make_read_preference(read_pref_mode_from_name(mode), None, max_staleness)
+
+async def connect_to_mongo(ping: bool = True):
     """Create database connection"""
-    global client, database
+    global client, database, read_database
     
     try:
         mongo_url = os.environ.get('MONGO_URL')
@@ -19,12 +159,20 @@ async def connect_to_mongo():
         if not mongo_url:
             raise ValueError("MONGO_URL environment variable is required")
         
-        client = AsyncIOMotorClient(mongo_url)
+        options = get_client_options()
+        client = AsyncIOMotorClient(mongo_url, **options)
         database = client[db_name]
         
-        # Test connection
-        await client.admin.command('ping')
-        logger.info(f"Successfully connected to MongoDB: {db_name}")
+        read_preference = get_read_heavy_preference()
+        read_database = database.with_options(read_preference=read_preference) if read_preference else database
+        
+        # Test connection (the client itself connects lazily)
+        if ping:
+            await ping_mongo()
+        logger.info(
+            f"{'Successfully connected to' if ping else 'Created client for'} MongoDB: {db_name} "
+            f"(maxPoolSize={options['maxPoolSize']}, minPoolSize={options['minPoolSize']})"
+        )
         
         return database
         
@@ -32,6 +180,10 @@ async def connect_to_mongo():
         logger.error(f"Failed to connect to MongoDB: {str(e)}")
         raise
 
+async def ping_mongo():
+    """Round trip to the server, raising if it can't be reached"""
+    await client.admin.command('ping')
+
 async def close_mongo_connection():
     """Close database connection"""
     global client
@@ -46,24 +198,69 @@ async def get_database():
         database = await connect_to_mongo()
     return database
 
+async def get_read_database():
+    """Get database handle for read-heavy routes (may prefer secondaries)"""
+    global read_database
+    if read_database is None:
+        await get_database()
+    return read_database if read_database is not None else database
+
 # Initialize collections and indexes
+def index_models() -> Dict[str, List[IndexModel]]:
+    """Every index the app relies on, by collection"""
+    from search import TEXT_INDEX_FIELDS, TEXT_INDEX_NAME, TEXT_INDEX_WEIGHTS
+    
+    return {
+        "contact_submissions": [
+            IndexModel("email"),
+            IndexModel("created_at"),
+            IndexModel("status"),
+            # Keyset pagination over (created_at, id), with and without a status filter
+            IndexModel([("status", 1), ("created_at", -1), ("id", -1)]),
+            IndexModel([("created_at", -1), ("id", -1)]),
+            # Incremental exports ordered by last change
+            IndexModel([("updated_at", 1), ("id", 1)]),
+            # Keyword search over contact messages
+            IndexModel(TEXT_INDEX_FIELDS, name=TEXT_INDEX_NAME, weights=TEXT_INDEX_WEIGHTS),
+        ],
+        "testimonials": [
+            IndexModel("is_active"),
+            IndexModel("created_at"),
+            IndexModel("updated_at"),
+        ],
+        "school_stats": [
+            IndexModel("last_updated"),
+        ],
+        # Idempotency claims expire on their own
+        "idempotency_keys": [
+            IndexModel("expires_at", expireAfterSeconds=0),
+        ],
+    }
+
+async def ensure_indexes(db) -> Dict[str, List[str]]:
+    """Create missing indexes with one createIndexes per collection, all collections at once"""
+    async def ensure(collection: str, models: List[IndexModel]) -> List[str]:
+        existing = {index["name"] async for index in db[collection].list_indexes()}
+        missing = [model for model in models if model.document["name"] not in existing]
+        if missing:
+            await db[collection].create_indexes(missing)
+        return [model.document["name"] for model in missing]
+    
+    collections = index_models()
+    results = await asyncio.gather(*(ensure(name, models) for name, models in collections.items()))
+    return {name: created for name, created in zip(collections, results) if created}
+
 async def setup_database():
     """Setup database collections and indexes"""
     try:
         db = await get_database()
         
-        # Create indexes for better performance
-        await db.contact_submissions.create_index("email")
-        await db.contact_submissions.create_index("created_at")
-        await db.contact_submissions.create_index("status")
-        
-        await db.testimonials.create_index("is_active")
-        await db.testimonials.create_index("created_at")
-        
-        await db.school_stats.create_index("last_updated")
-        
-        logger.info("Database indexes created successfully")
+        created = await ensure_indexes(db)
+        if created:
+            logger.info(f"Database indexes created: {created}")
+        else:
+            logger.info("Database indexes already up to date")
         
     except Exception as e:
         logger.error(f"Error setting up database: {str(e)}")
-        raise
\ No newline at end of file
+        raise
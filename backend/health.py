@@ -0,0 +1,179 @@
+"""
+Startup readiness tracking and dependency probes
+
+Liveness only says the process is serving HTTP. Readiness waits for the
+warm-up work (MongoDB reachable, indexes in place), which runs in the
+background after the server starts accepting connections unless
+DB_SETUP_ON_STARTUP=blocking. After that, readiness reports the result
+of a MongoDB ping refreshed by a background task, so probes themselves
+never touch the database.
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Optional
+
+from config import env_float, env_int, env_str
+from database import ping_mongo, pool_monitor
+
+logger = logging.getLogger(__name__)
+
+# background (serve at once, ready after warm-up), blocking (old behaviour) or off (skip index checks)
+DB_SETUP_ON_STARTUP = env_str("DB_SETUP_ON_STARTUP", "background").lower()
+WARMUP_MAX_RETRY_DELAY = 30.0
+
+HEALTH_PROBE_INTERVAL = env_float("HEALTH_PROBE_INTERVAL", 5.0)
+HEALTH_PING_TIMEOUT = env_float("HEALTH_PING_TIMEOUT", 2.0)
+# Above these the instance still works but should get less traffic; the pool
+# wait is the p99 over the last MONGO_POOL_WAIT_WINDOW_SECONDS of checkouts
+HEALTH_DEGRADED_PING_MS = env_float("HEALTH_DEGRADED_PING_MS", 250.0)
+HEALTH_DEGRADED_POOL_WAIT_MS = env_float("HEALTH_DEGRADED_POOL_WAIT_MS", 100.0)
+# Status code for degraded readiness; set 503 for load balancers that only read codes
+HEALTH_DEGRADED_STATUS_CODE = env_int("HEALTH_DEGRADED_STATUS_CODE", 200)
+
+
+class StartupTracker:
+    """Runs warm-up work and records when the app became ready"""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.ready = False
+        self.ready_after: Optional[float] = None
+        self.attempts = 0
+        self.error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def uptime(self) -> float:
+        return time.monotonic() - self.started_at
+
+    async def run(self, warm_up: Callable[[], Awaitable[None]]):
+        """Warm up in the foreground, raising on failure"""
+        self.attempts += 1
+        await warm_up()
+        self._mark_ready()
+
+    def start(self, warm_up: Callable[[], Awaitable[None]]):
+        """Warm up in the background, retrying with backoff until it succeeds"""
+        self._task = asyncio.create_task(self._retry(warm_up))
+
+    async def stop(self):
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+
+    async def _retry(self, warm_up: Callable[[], Awaitable[None]]):
+        delay = 1.0
+        while True:
+            try:
+                await self.run(warm_up)
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.error = str(e)
+                logger.error(f"Startup warm-up failed, retrying in {delay:.0f}s: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, WARMUP_MAX_RETRY_DELAY)
+
+    def _mark_ready(self):
+        self.ready = True
+        self.error = None
+        self.ready_after = round(self.uptime, 3)
+        logger.info(f"Application ready after {self.ready_after}s")
+
+    def snapshot(self) -> dict:
+        return {
+            "ready": self.ready,
+            "ready_after_seconds": self.ready_after,
+            "uptime_seconds": round(self.uptime, 3),
+            "warm_up_attempts": self.attempts,
+            "error": self.error
+        }
+
+
+class MongoProbe:
+    """Pings MongoDB on an interval and keeps the latest result for health checks"""
+
+    def __init__(
+        self,
+        interval: float = HEALTH_PROBE_INTERVAL,
+        timeout: float = HEALTH_PING_TIMEOUT,
+        degraded_ping_ms: float = HEALTH_DEGRADED_PING_MS,
+        degraded_pool_wait_ms: float = HEALTH_DEGRADED_POOL_WAIT_MS
+    ):
+        self.interval = interval
+        self.timeout = timeout
+        self.degraded_ping_ms = degraded_ping_ms
+        self.degraded_pool_wait_ms = degraded_pool_wait_ms
+        self.latency_ms: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+        self.failures = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(self.interval)
+
+    async def check(self):
+        """Ping once and record the latency or the error"""
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(ping_mongo(), timeout=self.timeout)
+            self.latency_ms = round((time.perf_counter() - started) * 1000, 3)
+            self.error = None
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.failures += 1
+            self.latency_ms = None
+            self.error = str(e) or type(e).__name__
+            logger.warning(f"MongoDB health ping failed: {self.error}")
+        self.checked_at = time.monotonic()
+
+    @property
+    def status(self) -> str:
+        """ok, degraded or down, from the cached results only"""
+        if self.checked_at is None or self.error is not None:
+            return "down"
+        # A probe loop that stopped reporting can't vouch for the database
+        if time.monotonic() - self.checked_at > self.interval * 3 + self.timeout:
+            return "down"
+        pool = pool_monitor.snapshot()
+        if self.latency_ms > self.degraded_ping_ms or pool["p99_wait_ms"] > self.degraded_pool_wait_ms:
+            return "degraded"
+        return "ok"
+
+    def snapshot(self) -> dict:
+        return {
+            "status": self.status,
+            "ping_ms": self.latency_ms,
+            "checked_seconds_ago": round(time.monotonic() - self.checked_at, 3) if self.checked_at else None,
+            "error": self.error,
+            "failures": self.failures,
+            "thresholds": {"ping_ms": self.degraded_ping_ms, "pool_p99_wait_ms": self.degraded_pool_wait_ms},
+            "pool": pool_monitor.snapshot()
+        }
+
+
+startup = StartupTracker()
+mongo_probe = MongoProbe()
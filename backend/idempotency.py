@@ -0,0 +1,325 @@
+"""
+Idempotent replays for public write endpoints
+
+A request claims one or more keys before it writes: the client's
+Idempotency-Key header and/or a hash of its content. Claims are documents
+in the idempotency_keys collection (TTL-indexed on expires_at), so a retry
+that reaches any worker within the window gets the original response back
+instead of writing again. Completed responses are also kept in a small
+in-process LRU so repeated retries skip the round trip.
+
+lookup() only reads, so a route can answer replays and run its rate
+limits before claim() writes anything. An unfinished claim holds its keys
+for IDEMPOTENCY_PENDING_LEASE seconds; after that (say the worker died
+mid-request) a retry takes it over instead of getting 409 until expiry.
+
+While contact write-behind is on, claims are not written on the request
+path: a request only reads for another worker's stored response, and
+completed responses are inserted in batches by a background queue.
+Concurrent duplicates on different workers can then both write until the
+batch is flushed.
+"""
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+from pymongo.errors import BulkWriteError
+
+from config import env_int
+from database import get_database
+from write_behind import DUPLICATE_KEY_ERROR, QueueFullError, WriteBehindQueue
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_COLLECTION = "idempotency_keys"
+IDEMPOTENCY_TTL = env_int("IDEMPOTENCY_TTL_SECONDS", 24 * 3600)
+IDEMPOTENCY_CACHE_SIZE = env_int("IDEMPOTENCY_CACHE_SIZE", 1024)
+# How long an unfinished claim blocks retries; keep it above the slowest request
+IDEMPOTENCY_PENDING_LEASE = env_int("IDEMPOTENCY_PENDING_LEASE_SECONDS", 30)
+
+
+@dataclass
+class Claim:
+    """A key a request must own before writing, valid for `ttl` seconds"""
+    key: str
+    ttl: int
+    # Hash of the request body; a reused key with a different body is rejected
+    fingerprint: Optional[str] = None
+
+
+def digest(*parts: str) -> str:
+    return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+
+class IdempotencyStore:
+    """Claims and stored responses in MongoDB with an LRU of completed responses"""
+
+    def __init__(
+        self,
+        collection_name: str = IDEMPOTENCY_COLLECTION,
+        cache_size: int = IDEMPOTENCY_CACHE_SIZE,
+        write_queue: Optional[WriteBehindQueue] = None
+    ):
+        self.collection_name = collection_name
+        self.cache_size = cache_size
+        self.write_queue = write_queue
+        self.replayed = 0
+        self._cache: "OrderedDict[str, tuple]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    @property
+    def deferred(self) -> bool:
+        """Whether completed responses are stored in the background"""
+        return self.write_queue is not None and self.write_queue.running
+
+    async def lookup(self, claims: List[Claim]) -> Optional[dict]:
+        """Return a stored response for any of the keys without claiming them"""
+        if not claims:
+            return None
+        for claim in claims:
+            response = await self._local_response(claim)
+            if response is not None:
+                self.replayed += 1
+                return response
+        existing = await self._find(claims)
+        now = datetime.utcnow()
+        for claim in claims:
+            response = self._stored_response(claim, existing.get(claim.key), now)
+            if response is not None:
+                self.replayed += 1
+                return response
+        return None
+
+    async def claim(self, claims: List[Claim]) -> Optional[dict]:
+        """Claim every key, or return the stored response if one was already completed"""
+        if not claims:
+            return None
+        for claim in claims:
+            response = await self._local_response(claim)
+            if response is not None:
+                self.replayed += 1
+                return response
+        # Registered before any await so duplicates in this process wait for us
+        loop = asyncio.get_running_loop()
+        for claim in claims:
+            self._pending[claim.key] = loop.create_future()
+        if self.deferred:
+            # Nothing is written until completion; lookup() already checked the store
+            return None
+        response = await self._insert_claims(claims)
+        if response is not None:
+            self.replayed += 1
+        return response
+
+    async def complete(self, claims: List[Claim], response: dict):
+        """Store the response for every claimed key"""
+        for claim in claims:
+            self._remember(claim, response)
+            future = self._pending.pop(claim.key, None)
+            if future is not None and not future.done():
+                future.set_result(response)
+        if self.deferred:
+            await self._queue_responses(claims, response)
+            return
+        try:
+            db = await get_database()
+            await db[self.collection_name].update_many(
+                {"_id": {"$in": [claim.key for claim in claims]}},
+                {"$set": {"response": response}, "$unset": {"pending_until": ""}}
+            )
+        except Exception as e:
+            # The write itself succeeded; only cross-worker replay is lost
+            logger.error(f"Failed to store idempotent response: {str(e)}")
+
+    async def release(self, claims: List[Claim]):
+        """Drop unfinished claims so the client can retry"""
+        self._settle(claims)
+        if not claims or self.deferred:
+            # Nothing was written for deferred claims
+            return
+        try:
+            db = await get_database()
+            await db[self.collection_name].delete_many(
+                {"_id": {"$in": [claim.key for claim in claims]}, "response": None}
+            )
+        except Exception as e:
+            logger.error(f"Failed to release idempotency claims: {str(e)}")
+
+    async def _local_response(self, claim: Claim) -> Optional[dict]:
+        """A response from the LRU, after any request in this process holding the key"""
+        while True:
+            cached = self._cache.get(claim.key)
+            if cached is not None:
+                expires_at, fingerprint, response = cached
+                if expires_at > datetime.utcnow():
+                    self._check_fingerprint(claim, fingerprint)
+                    self._cache.move_to_end(claim.key)
+                    return response
+                del self._cache[claim.key]
+            pending = self._pending.get(claim.key)
+            if pending is None:
+                return None
+            await asyncio.shield(pending)
+
+    async def _find(self, claims: List[Claim]) -> Dict[str, dict]:
+        """Stored claims for the keys by _id, in one round trip"""
+        try:
+            db = await get_database()
+            cursor = db[self.collection_name].find({"_id": {"$in": [claim.key for claim in claims]}})
+            return {document["_id"]: document async for document in cursor}
+        except Exception as e:
+            # Never turn a submission away because the dedupe store is unavailable
+            logger.error(f"Idempotency lookup failed, continuing without it: {str(e)}")
+            return {}
+
+    def _stored_response(self, claim: Claim, document: Optional[dict], now: datetime) -> Optional[dict]:
+        """The response in a stored claim, None if it can be taken, or 409 while it is held"""
+        if document is None or document["expires_at"] <= now:
+            return None
+        self._check_fingerprint(claim, document.get("fingerprint"))
+        if document.get("response") is None:
+            pending_until = document.get("pending_until")
+            if pending_until is not None and pending_until <= now:
+                # The request that claimed it never finished
+                return None
+            raise self._in_progress()
+        self._remember(claim, document["response"], document["expires_at"])
+        return document["response"]
+
+    async def _insert_claims(self, claims: List[Claim]) -> Optional[dict]:
+        """Insert every claim at once, taking over expired or abandoned ones"""
+        now = datetime.utcnow()
+        documents = {claim.key: self._claim_document(claim, now) for claim in claims}
+        owned = []
+        try:
+            db = await get_database()
+            collection = db[self.collection_name]
+            keys, taken_keys = list(documents), set()
+            try:
+                await collection.insert_many(list(documents.values()), ordered=False)
+            except BulkWriteError as e:
+                write_errors = e.details.get("writeErrors", [])
+                if any(error.get("code") != DUPLICATE_KEY_ERROR for error in write_errors):
+                    raise
+                taken_keys = {keys[error["index"]] for error in write_errors}
+            owned = [claim for claim in claims if claim.key not in taken_keys]
+            taken = [claim for claim in claims if claim.key in taken_keys]
+            if not taken:
+                return None
+
+            existing = await self._find(taken)
+            for claim in taken:
+                document = existing.get(claim.key)
+                response = self._stored_response(claim, document, now)
+                if response is not None:
+                    await self._release_owned(claims, owned)
+                    return response
+                # Expired, abandoned or swept since the insert; only one retry wins it
+                result = await collection.replace_one(
+                    {
+                        "_id": claim.key,
+                        "expires_at": document["expires_at"],
+                        "pending_until": document.get("pending_until")
+                    } if document else {"_id": claim.key},
+                    documents[claim.key],
+                    upsert=document is None
+                )
+                if result.modified_count == 0 and result.upserted_id is None:
+                    raise self._in_progress()
+                owned.append(claim)
+        except HTTPException:
+            await self._release_owned(claims, owned)
+            raise
+        except Exception as e:
+            # Never turn a submission away because the dedupe store is unavailable
+            logger.error(f"Idempotency claim failed, continuing without it: {str(e)}")
+        return None
+
+    async def _release_owned(self, claims: List[Claim], owned: List[Claim]):
+        """Give up a partial claim: wake local waiters and delete only what was inserted"""
+        self._settle(claims)
+        await self.release(owned)
+
+    def _settle(self, claims: List[Claim]):
+        """Wake requests in this process waiting on the keys without a response"""
+        for claim in claims:
+            future = self._pending.pop(claim.key, None)
+            if future is not None and not future.done():
+                future.set_result(None)
+
+    @staticmethod
+    def _claim_document(claim: Claim, now: datetime) -> dict:
+        return {
+            "_id": claim.key,
+            "fingerprint": claim.fingerprint,
+            "response": None,
+            "created_at": now,
+            "pending_until": now + timedelta(seconds=min(IDEMPOTENCY_PENDING_LEASE, claim.ttl)),
+            "expires_at": now + timedelta(seconds=claim.ttl)
+        }
+
+    async def _queue_responses(self, claims: List[Claim], response: dict):
+        """Hand completed claims to the background queue"""
+        now = datetime.utcnow()
+        for claim in claims:
+            try:
+                await self.write_queue.put({
+                    "_id": claim.key,
+                    "fingerprint": claim.fingerprint,
+                    "response": response,
+                    "created_at": now,
+                    "expires_at": now + timedelta(seconds=claim.ttl)
+                })
+            except QueueFullError as e:
+                # The write itself succeeded; only cross-worker replay is lost
+                logger.error(f"Failed to queue idempotent response: {str(e)}")
+
+    def clear(self):
+        """Forget every cached response (tests and benchmarks)"""
+        self._cache.clear()
+
+    def _remember(self, claim: Claim, response: dict, expires_at: Optional[datetime] = None):
+        if expires_at is None:
+            expires_at = datetime.utcnow() + timedelta(seconds=claim.ttl)
+        self._cache[claim.key] = (expires_at, claim.fingerprint, response)
+        self._cache.move_to_end(claim.key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def _check_fingerprint(claim: Claim, fingerprint: Optional[str]):
+        if claim.fingerprint and fingerprint and claim.fingerprint != fingerprint:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used for a different request"
+            )
+
+    @staticmethod
+    def _in_progress() -> HTTPException:
+        return HTTPException(
+            status_code=409,
+            detail="An identical request is still being processed",
+            headers={"Retry-After": "1"}
+        )
+
+    def snapshot(self) -> dict:
+        return {
+            "cached": len(self._cache),
+            "pending": len(self._pending),
+            "deferred": self.deferred,
+            "replayed": self.replayed
+        }
+
+
+# Completed responses, batched in the background while contact write-behind is on
+idempotency_write_queue = WriteBehindQueue(
+    IDEMPOTENCY_COLLECTION,
+    max_size=env_int("IDEMPOTENCY_WRITE_BEHIND_MAX_SIZE", 10000)
+)
+
+idempotency_store = IdempotencyStore(write_queue=idempotency_write_queue)
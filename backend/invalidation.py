@@ -0,0 +1,264 @@
+"""
+Cross-worker cache invalidation
+
+Each worker keeps its own ResponseCaches, so a write handled by one
+worker has to reach the others. The bus tails a MongoDB change stream on
+the watched collections and invalidates the caches registered for them.
+Each watch can narrow the events that count with a `match` on the change
+event; the filters go into the stream's $match, so the server drops
+everything else (contact inserts, counter $incs) before it reaches any
+worker.
+
+Change streams need a replica set; on a standalone mongod the bus falls
+back to polling each collection's timestamp field, which picks up inserts
+and updates (not deletes) within one poll interval. Polling can't see
+events, so a watch with a `match` that its timestamp field can't express
+polls the collection's shared version document instead (poll_version),
+which writers bump only for the matching changes. Only the server's
+"replica set required" answer triggers that fallback; connection errors
+(MongoDB still starting, a failover) are retried with backoff.
+"""
+import asyncio
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pymongo.errors import OperationFailure
+
+from cache import ResponseCache
+from config import env_float, env_str
+from counters import COLLECTION_VERSIONS
+from database import get_database
+
+logger = logging.getLogger(__name__)
+
+# auto (change streams, falling back to polling), poll or off
+INVALIDATION_MODE = env_str("CACHE_INVALIDATION_MODE", "auto").lower()
+INVALIDATION_POLL_INTERVAL = env_float("CACHE_INVALIDATION_POLL_INTERVAL", 5.0)
+INVALIDATION_RETRY_DELAY = 1.0
+INVALIDATION_MAX_RETRY_DELAY = 30.0
+
+# $changeStream is only supported on replica sets / unrecognized pipeline stage (very old servers)
+CHANGE_STREAM_UNSUPPORTED_CODES = {40573, 40324}
+
+
+class ChangeStreamUnavailable(Exception):
+    """Raised when the deployment can't open a change stream"""
+
+
+def change_streams_unsupported(error: Exception) -> bool:
+    """True when the server refused a change stream because of its topology"""
+    return isinstance(error, OperationFailure) and error.code in CHANGE_STREAM_UNSUPPORTED_CODES
+
+
+@dataclass(frozen=True)
+class PollSignal:
+    """What polling compares: the newest `field` in a collection, or in one of its documents"""
+    collection: str
+    field: str
+    document_id: Optional[str] = None
+
+
+@dataclass
+class Watch:
+    cache: ResponseCache
+    # Where the polling fallback looks for changes
+    poll: PollSignal
+    # Change events that should evict the cache, as a $match run by the server
+    match: Optional[dict] = None
+    # Only changes to this document (by _id) evict the cache
+    document_id: Optional[str] = None
+
+
+class InvalidationBus:
+    """Invalidates registered caches when their collections change in any process"""
+
+    def __init__(self, mode: str = INVALIDATION_MODE, poll_interval: float = INVALIDATION_POLL_INTERVAL):
+        self.requested_mode = mode
+        self.poll_interval = poll_interval
+        self.mode: Optional[str] = None
+        self.events = 0
+        self.invalidations = 0
+        self.last_event_at: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self._watches: Dict[str, List[Watch]] = defaultdict(list)
+        self._task: Optional[asyncio.Task] = None
+
+    def watch(
+        self,
+        collection: str,
+        cache: ResponseCache,
+        timestamp_field: str = "updated_at",
+        match: Optional[dict] = None,
+        document_id: Optional[str] = None,
+        poll_version: bool = False
+    ):
+        """Invalidate `cache` whenever `collection` (or one document in it) changes"""
+        if poll_version:
+            poll = PollSignal(COLLECTION_VERSIONS, "updated_at", collection)
+        else:
+            poll = PollSignal(collection, timestamp_field, document_id)
+        self._watches[collection].append(Watch(cache, poll, match, document_id))
+
+    def watch_version(self, collection: str, cache: ResponseCache):
+        """Invalidate `cache` whenever the shared version of `collection` is bumped"""
+        self.watch(COLLECTION_VERSIONS, cache, document_id=collection)
+
+    def start(self):
+        """Start tailing changes in the background"""
+        if self.requested_mode == "off" or not self._watches or self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the background task"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self.mode = None
+
+    async def _run(self):
+        if self.requested_mode == "auto":
+            try:
+                await self._tail()
+                return
+            except ChangeStreamUnavailable as e:
+                logger.warning(f"Change streams unavailable ({e}); polling every {self.poll_interval}s instead")
+        await self._poll()
+
+    def _pipeline(self) -> List[dict]:
+        """Change stream stages that keep only events some watch acts on"""
+        conditions = []
+        for collection, watches in self._watches.items():
+            for watch in watches:
+                condition = {"ns.coll": collection}
+                if watch.document_id is not None:
+                    condition["documentKey._id"] = watch.document_id
+                condition.update(watch.match or {})
+                if condition not in conditions:
+                    conditions.append(condition)
+        return [
+            {"$match": {"$or": conditions}},
+            # Dispatch only needs to know what changed, never the document itself
+            {"$project": {"ns": 1, "documentKey": 1, "operationType": 1}}
+        ]
+
+    async def _tail(self):
+        """Follow one database-level change stream, resuming after transient errors"""
+        pipeline = self._pipeline()
+        resume_token = None
+        delay = INVALIDATION_RETRY_DELAY
+
+        while True:
+            try:
+                db = await get_database()
+                async with db.watch(pipeline, resume_after=resume_token) as stream:
+                    # try_next opens the cursor, so a standalone mongod fails here
+                    event = await stream.try_next()
+                    if self.mode is None:
+                        logger.info(f"Cache invalidation following change streams on {', '.join(self._watches)}")
+                    self.mode = "change_stream"
+                    self.last_error = None
+                    delay = INVALIDATION_RETRY_DELAY
+                    while True:
+                        if event is not None:
+                            resume_token = stream.resume_token
+                            self._dispatch_event(event)
+                        event = await stream.next()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if change_streams_unsupported(e):
+                    raise ChangeStreamUnavailable(str(e)) from e
+                self.last_error = str(e)
+                if self.mode is None:
+                    logger.error(f"Opening change stream failed, retrying in {delay:.0f}s: {str(e)}")
+                else:
+                    logger.error(f"Change stream interrupted, resuming in {delay:.0f}s: {str(e)}")
+                # Events may have been missed while disconnected
+                self._invalidate_all()
+                if "ChangeStreamHistoryLost" in str(e):
+                    resume_token = None
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, INVALIDATION_MAX_RETRY_DELAY)
+
+    async def _poll(self):
+        """Invalidate caches when the newest timestamp of their poll signal moves forward"""
+        self.mode = "poll"
+        signals: Dict[PollSignal, List[Watch]] = defaultdict(list)
+        for watches in self._watches.values():
+            for watch in watches:
+                signals[watch.poll].append(watch)
+        # The first successful read of each signal is its baseline
+        last_seen: Dict[PollSignal, Optional[datetime]] = {}
+
+        while True:
+            for signal, watches in signals.items():
+                try:
+                    db = await get_database()
+                    latest = await self._latest(db, signal)
+                except Exception as e:
+                    self.last_error = str(e)
+                    logger.error(f"Polling {signal.collection} for changes failed: {str(e)}")
+                    continue
+                self.last_error = None
+                if signal not in last_seen:
+                    last_seen[signal] = latest
+                elif latest is not None and (last_seen[signal] is None or latest > last_seen[signal]):
+                    last_seen[signal] = latest
+                    self._invalidate(watches)
+            await asyncio.sleep(self.poll_interval)
+
+    async def _latest(self, db, signal: PollSignal) -> Optional[datetime]:
+        query = {} if signal.document_id is None else {"_id": signal.document_id}
+        document = await db[signal.collection].find_one(
+            query, {"_id": 0, signal.field: 1}, sort=[(signal.field, -1)]
+        )
+        return document.get(signal.field) if document else None
+
+    def _dispatch_event(self, event: dict):
+        """Invalidate the caches watching what a change event touched"""
+        # The server already applied each watch's match; an event that passes one
+        # match on a collection evicts every cache watching that collection
+        document_id = (event.get("documentKey") or {}).get("_id")
+        self._invalidate([
+            watch for watch in self._watches.get(event["ns"]["coll"], [])
+            if watch.document_id is None or watch.document_id == document_id
+        ])
+
+    def _invalidate(self, watches: List[Watch]):
+        self.events += 1
+        self.last_event_at = datetime.utcnow()
+        for watch in watches:
+            watch.cache.invalidate()
+            self.invalidations += 1
+
+    def _invalidate_all(self):
+        for watches in self._watches.values():
+            for watch in watches:
+                watch.cache.invalidate()
+
+    def snapshot(self) -> dict:
+        starting = self._task is not None and self.mode is None
+        return {
+            "mode": self.mode or ("starting" if starting else "stopped"),
+            "collections": {
+                collection: [watch.cache.name for watch in watches]
+                for collection, watches in self._watches.items()
+            },
+            "poll_interval": self.poll_interval if self.mode == "poll" else None,
+            "events": self.events,
+            "invalidations": self.invalidations,
+            "last_event_at": self.last_event_at.isoformat() if self.last_event_at else None,
+            "last_error": self.last_error
+        }
+
+
+invalidation_bus = InvalidationBus()
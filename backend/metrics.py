@@ -0,0 +1,243 @@
+"""
+Prometheus-style metrics for HTTP routes and MongoDB commands
+
+MetricsMiddleware records per-route latency histograms, in-flight
+gauges and status counts. CommandMetrics is a pymongo command listener
+that times every MongoDB command by collection and command name. Both
+are exposed, together with cache and connection pool statistics, in the
+Prometheus text format by metrics_endpoint.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Sequence, Tuple
+
+from pymongo import monitoring
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# Every metric in this process, in exposition order
+registry: List["Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Metric(ABC):
+    """Base class for labelled metrics; safe to update from any thread"""
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Exposition lines for every label set"""
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}" for labels, value in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=HTTP_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str):
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[index] += 1
+                    break
+            else:
+                state[len(self.buckets)] += 1
+            state[-1] += value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((labels, list(state)) for labels, state in self._values.items())
+        lines = []
+        for labels, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                bucket_labels = _labels(self.labelnames, labels, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {state[-1]!r}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+http_requests_total = Counter(
+    "http_requests_total", "HTTP requests by route and status code", ("method", "route", "status")
+)
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+)
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served", ("method",)
+)
+mongo_command_duration = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency by collection and command",
+    ("collection", "command"), buckets=MONGO_BUCKETS
+)
+mongo_command_failures = Counter(
+    "mongodb_command_failures_total", "Failed MongoDB commands by collection and command",
+    ("collection", "command")
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and in-flight requests per route"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc(method)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_flight.dec(method)
+            # The router stores the matched route (or plain endpoint) in the shared scope
+            route_path = getattr(scope.get("route"), "path", None)
+            if route_path is None:
+                route_path = scope["path"] if scope.get("endpoint") else "unmatched"
+            http_request_duration.observe(time.perf_counter() - start, method, route_path)
+            http_requests_total.inc(method, route_path, str(status_code))
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Times MongoDB commands; pymongo reports find, insert, update, aggregate, ..."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._collections: Dict[Tuple[object, int], str] = {}
+
+    @staticmethod
+    def _collection(event) -> str:
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        return target if isinstance(target, str) else event.database_name
+
+    def started(self, event):
+        with self._lock:
+            self._collections[(event.connection_id, event.request_id)] = self._collection(event)
+
+    def _finish(self, event) -> str:
+        with self._lock:
+            return self._collections.pop((event.connection_id, event.request_id), "unknown")
+
+    def succeeded(self, event):
+        collection = self._finish(event)
+        mongo_command_duration.observe(event.duration_micros / 1e6, collection, event.command_name)
+
+    def failed(self, event):
+        collection = self._finish(event)
+        mongo_command_duration.observe(event.duration_micros / 1e6, collection, event.command_name)
+        mongo_command_failures.inc(collection, event.command_name)
+
+
+mongo_command_listener = CommandMetrics()
+
+
+def _process_samples() -> List[str]:
+    """Cache and connection pool statistics gathered at scrape time"""
+    from cache import caches
+    from database import pool_monitor
+
+    lines = []
+    for field, kind in (("hits", "counter"), ("misses", "counter"), ("coalesced", "counter"), ("entries", "gauge")):
+        name = f"response_cache_{field}" + ("_total" if kind == "counter" else "")
+        lines.append(f"# TYPE {name} {kind}")
+        for cache_name, cache in sorted(caches.items()):
+            lines.append(f'{name}{{cache="{_escape(cache_name)}"}} {cache.snapshot()[field]}')
+
+    pool = pool_monitor.snapshot()
+    for field, kind in (("checkouts", "counter"), ("checkout_failures", "counter"),
+                        ("open_connections", "gauge"), ("in_use", "gauge")):
+        name = f"mongodb_pool_{field}" + ("_total" if kind == "counter" else "")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.append(f"{name} {pool[field]}")
+    return lines
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    for metric in registry:
+        lines.extend(metric.render())
+    lines.extend(_process_samples())
+    return "\n".join(lines) + "\n"
+
+
+async def metrics_endpoint(request: Request):
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,40 @@
+"""
+Apply schema migrations (index builds) ahead of a deploy
+
+Creates any missing indexes, one createIndexes call per collection with
+all collections in parallel, and reports what it built. Run it from the
+deploy pipeline and start the app with DB_SETUP_ON_STARTUP=off so workers
+skip the index check on boot:
+
+    python migrate.py
+"""
+import asyncio
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+from database import close_mongo_connection, connect_to_mongo, ensure_indexes
+
+
+async def main():
+    db = await connect_to_mongo()
+    try:
+        started = time.perf_counter()
+        created = await ensure_indexes(db)
+        elapsed = time.perf_counter() - started
+        if created:
+            for collection, names in created.items():
+                print(f"{collection}: created {', '.join(names)}")
+        else:
+            print("All indexes already exist")
+        print(f"Done in {elapsed:.2f}s")
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,9 +1,27 @@
 from datetime import datetime
-from pydantic import BaseModel, Field, validator
-from typing import Optional, List
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import Optional, List, Dict
 from enum import Enum
+import re
 import uuid
 
+# Compiled once at import; validators run on every submission
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+NON_DIGITS = re.compile(r'\D')
+
+def check_email(v: str) -> str:
+    if not EMAIL_PATTERN.match(v):
+        raise ValueError('Invalid email format')
+    return v.lower()
+
+def check_phone(v: Optional[str]) -> Optional[str]:
+    if v is None:
+        return v
+    # Remove non-numeric characters for validation but keep original format
+    if len(NON_DIGITS.sub('', v)) < 10:
+        raise ValueError('Phone number must have at least 10 digits')
+    return v
+
 # Enums
 class ContactStatus(str, Enum):
     NEW = "new"
@@ -22,24 +40,15 @@ class ContactSubmission(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
-    @validator('email')
+    @field_validator('email')
+    @classmethod
     def validate_email(cls, v):
-        import re
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(pattern, v):
-            raise ValueError('Invalid email format')
-        return v.lower()
+        return check_email(v)
 
-    @validator('phone')
+    @field_validator('phone')
+    @classmethod
     def validate_phone(cls, v):
-        if v is None:
-            return v
-        # Remove non-numeric characters for validation but keep original format
-        import re
-        digits_only = re.sub(r'[^\d]', '', v)
-        if len(digits_only) < 10:
-            raise ValueError('Phone number must have at least 10 digits')
-        return v
+        return check_phone(v)
 
 class SchoolTestimonial(BaseModel):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -59,6 +68,13 @@ class SchoolStats(BaseModel):
     total_teachers: int = Field(default=15000)
     average_satisfaction: float = Field(default=4.8)
     last_updated: datetime = Field(default_factory=datetime.utcnow)
+    # Counters maintained incrementally by counters.py
+    contacts_total: int = Field(default=0)
+    contacts_by_status: Dict[str, int] = Field(default_factory=dict)
+    testimonials_total: int = Field(default=0)
+    testimonials_active: int = Field(default=0)
+    testimonial_rating_sum: int = Field(default=0)
+    average_rating: Optional[float] = None
 
 # Request Models (for API input)
 class ContactSubmissionCreate(BaseModel):
@@ -68,13 +84,63 @@ class ContactSubmissionCreate(BaseModel):
     phone: Optional[str] = Field(None, max_length=20)
     message: str = Field(..., min_length=1, max_length=1000)
 
-    @validator('email')
+    @field_validator('email')
+    @classmethod
     def validate_email(cls, v):
-        import re
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(pattern, v):
-            raise ValueError('Invalid email format')
-        return v.lower()
+        return check_email(v)
+
+    @field_validator('phone')
+    @classmethod
+    def validate_phone(cls, v):
+        return check_phone(v)
+
+    def to_submission(self) -> "ContactSubmission":
+        """Build the stored submission from already-validated input without revalidating"""
+        # Every field is passed explicitly: model_construct resolves default
+        # factories through signature inspection, which costs more than validating
+        now = datetime.utcnow()
+        return ContactSubmission.model_construct(
+            id=str(uuid.uuid4()),
+            name=self.name,
+            email=self.email,
+            school=self.school,
+            phone=self.phone,
+            message=self.message,
+            status=ContactStatus.NEW,
+            created_at=now,
+            updated_at=now
+        )
+
+class ContactStatusFilter(BaseModel):
+    status: Optional[ContactStatus] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+    def to_query(self) -> dict:
+        query = {}
+        if self.status:
+            query["status"] = self.status.value
+        if self.created_after or self.created_before:
+            query["created_at"] = {}
+            if self.created_after:
+                query["created_at"]["$gte"] = self.created_after
+            if self.created_before:
+                query["created_at"]["$lt"] = self.created_before
+        return query
+
+class ContactStatusBulkUpdate(BaseModel):
+    status: ContactStatus
+    ids: Optional[List[str]] = Field(None, min_length=1, max_length=10000)
+    filter: Optional[ContactStatusFilter] = None
+
+    @model_validator(mode='after')
+    def check_target(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError('Provide either ids or filter')
+        # An empty filter would rewrite every contact
+        if self.filter is not None and not self.filter.to_query():
+            raise ValueError('filter must set status, created_after or created_before')
+        return self
 
 class TestimonialCreate(BaseModel):
     text: str = Field(..., min_length=10, max_length=500)
@@ -97,4 +163,14 @@ class TestimonialsResponse(APIResponse):
     data: Optional[List[SchoolTestimonial]] = None
 
 class StatsResponse(APIResponse):
-    data: Optional[SchoolStats] = None
\ No newline at end of file
+    data: Optional[SchoolStats] = None
+
+# Mongo projections returning only the fields each model exposes
+def projection_for(model: type) -> dict:
+    projection = {field: 1 for field in model.model_fields}
+    projection["_id"] = 0
+    return projection
+
+CONTACT_PROJECTION = projection_for(ContactSubmission)
+TESTIMONIAL_PROJECTION = projection_for(SchoolTestimonial)
+STATS_PROJECTION = projection_for(SchoolStats)
@@ -0,0 +1,204 @@
+"""
+Opt-in per-request profiling
+
+ProfilingMiddleware samples the call stack of a request's task from a
+background thread while the request runs. When the task is running, the
+sample is the live thread stack; while it is suspended (awaiting Motor,
+for example) the sample is the chain of awaiting coroutines. Samples
+are written in the folded-stack format used by flamegraph.pl and
+speedscope.
+
+Profiling is triggered for a PROFILE_SAMPLE_RATE fraction of requests,
+or by sending `X-Profile: save|inline` together with an
+`X-Profile-Token` matching PROFILE_TOKEN. "inline" replaces the response
+body with the folded stacks. When neither is configured the middleware
+only checks one flag per request.
+"""
+import asyncio
+import logging
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import List, Optional
+
+from config import env_float, env_str
+
+logger = logging.getLogger(__name__)
+
+PROFILE_SAMPLE_RATE = env_float("PROFILE_SAMPLE_RATE", 0.0)
+PROFILE_TOKEN = env_str("PROFILE_TOKEN")
+PROFILE_DIR = Path(env_str("PROFILE_DIR", "/tmp/profiles"))
+PROFILE_INTERVAL = env_float("PROFILE_INTERVAL_MS", 5.0) / 1000
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class TaskSampler:
+    """Background thread collecting folded stacks for one asyncio task"""
+
+    # The sampler thread needs the GIL to take a sample, so the switch
+    # interval is lowered to the sampling interval while any sampler runs
+    _active = 0
+    _saved_switch_interval = None
+    _switch_lock = threading.Lock()
+
+    def __init__(self, task: asyncio.Task, root_frame, interval: float = PROFILE_INTERVAL):
+        self.task = task
+        self.loop = task.get_loop()
+        self.thread_id = threading.get_ident()
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        # Stacks are cut at this frame so they start at the middleware
+        self._root = root_frame
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        with TaskSampler._switch_lock:
+            if TaskSampler._active == 0:
+                TaskSampler._saved_switch_interval = sys.getswitchinterval()
+                sys.setswitchinterval(min(self.interval, TaskSampler._saved_switch_interval))
+            TaskSampler._active += 1
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        with TaskSampler._switch_lock:
+            TaskSampler._active -= 1
+            if TaskSampler._active == 0:
+                sys.setswitchinterval(TaskSampler._saved_switch_interval)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                stack = self._sample()
+            except Exception:  # frames can change under us; skip the sample
+                continue
+            if stack and not self._stop.is_set():
+                self.stacks[";".join(stack)] += 1
+                self.samples += 1
+
+    def _sample(self) -> List[str]:
+        if asyncio.current_task(self.loop) is self.task:
+            return self._running_stack()
+        return self._awaiting_stack()
+
+    def _running_stack(self) -> List[str]:
+        frame = sys._current_frames().get(self.thread_id)
+        stack = []
+        while frame is not None:
+            stack.append(_frame_label(frame))
+            if frame is self._root:
+                break
+            frame = frame.f_back
+        return list(reversed(stack))
+
+    def _awaiting_stack(self) -> List[str]:
+        stack = []
+        inside = False
+        awaitable = self.task.get_coro()
+        while awaitable is not None:
+            frame = getattr(awaitable, "cr_frame", None) or getattr(awaitable, "gi_frame", None)
+            if frame is None:
+                stack.append(f"[await {type(awaitable).__name__}]")
+                break
+            inside = inside or frame is self._root
+            if inside:
+                stack.append(_frame_label(frame))
+            awaitable = getattr(awaitable, "cr_await", None) or getattr(awaitable, "gi_yieldfrom", None)
+        return stack if inside else []
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles sampled or explicitly requested requests"""
+
+    def __init__(self, app):
+        self.app = app
+        self.enabled = PROFILE_SAMPLE_RATE > 0 or PROFILE_TOKEN is not None
+
+    def _mode(self, scope) -> Optional[str]:
+        if PROFILE_TOKEN is not None:
+            headers = dict(scope["headers"])
+            mode = headers.get(b"x-profile", b"").decode("latin-1").lower()
+            token = headers.get(b"x-profile-token", b"").decode("latin-1")
+            if mode in ("save", "inline") and token == PROFILE_TOKEN:
+                return mode
+        if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+            return "save"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        mode = self._mode(scope)
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def capture_send(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            # Inline profiles replace the real response body
+            if mode != "inline":
+                await send(message)
+
+        sampler = TaskSampler(asyncio.current_task(), sys._getframe())
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, capture_send)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            # Joining the sampler can take a whole interval; keep other requests running
+            await asyncio.to_thread(sampler.stop)
+
+        folded = sampler.folded()
+        logger.info(
+            f"Profiled {scope['method']} {scope['path']}: "
+            f"{sampler.samples} samples in {elapsed_ms:.1f}ms"
+        )
+
+        if mode == "inline":
+            body = folded.encode()
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"x-profile-status", str(status_code).encode()),
+                    (b"x-profile-samples", str(sampler.samples).encode()),
+                    (b"x-profile-duration-ms", f"{elapsed_ms:.1f}".encode())
+                ]
+            })
+            await send({"type": "http.response.body", "body": body})
+        else:
+            await asyncio.to_thread(self._save, scope, folded)
+
+    @staticmethod
+    def _save(scope, folded: str):
+        try:
+            PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+            slug = re.sub(r"[^A-Za-z0-9]+", "_", scope["path"]).strip("_") or "root"
+            path = PROFILE_DIR / f"{time.strftime('%Y%m%dT%H%M%S')}-{int(time.time() * 1000) % 1000:03d}-{scope['method']}-{slug}.folded"
+            path.write_text(folded)
+        except OSError as e:
+            logger.error(f"Failed to save request profile: {str(e)}")
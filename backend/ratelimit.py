@@ -0,0 +1,214 @@
+"""
+Rate limiting and admission control for public write endpoints
+
+Token buckets throttle individual clients (by IP and by email) and an
+admission controller caps concurrent database writes across the process,
+so a burst of spam sheds with 429/503 instead of queueing behind the
+connection pool and slowing down reads.
+
+Buckets live in process memory. A shared store (Redis, Mongo) can be
+plugged in later by subclassing RateLimitBackend.
+"""
+import asyncio
+import logging
+import math
+import time
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from fastapi import HTTPException, Request
+
+from config import env_bool, env_float, env_int, env_str
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = env_bool("RATE_LIMIT_ENABLED", True)
+
+# Where per-IP limits get the client address:
+#   client    - request.client, i.e. the peer, or the visitor once uvicorn's
+#               proxy-header handling trusts the ingress (FORWARDED_ALLOW_IPS)
+#   forwarded - the first X-Forwarded-For entry, only behind a proxy that sets it
+#   off       - no per-IP limits (email limits still apply)
+# Behind an untrusted proxy every visitor shares the proxy's address, so the
+# default is off unless uvicorn was told which proxies to trust
+RATE_LIMIT_CLIENT_IP = env_str(
+    "RATE_LIMIT_CLIENT_IP",
+    "client" if env_str("FORWARDED_ALLOW_IPS") else "off"
+).lower()
+
+
+@dataclass
+class TokenBucket:
+    """Bucket refilled at `rate` tokens per second up to `capacity`"""
+    tokens: float
+    updated_at: float = field(default_factory=time.monotonic)
+
+    def take(self, rate: float, capacity: float, cost: float = 1.0) -> float:
+        """Spend `cost` tokens; return 0 on success or seconds until they are available"""
+        now = time.monotonic()
+        self.tokens = min(capacity, self.tokens + (now - self.updated_at) * rate)
+        self.updated_at = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / rate
+
+
+class RateLimitBackend(ABC):
+    """Storage for token buckets; subclass to share buckets between processes"""
+
+    @abstractmethod
+    async def consume(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> float:
+        """Spend tokens from the bucket for `key`; return the retry delay or 0"""
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Per-process buckets, pruned once they would be full again"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    async def consume(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> float:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                self._prune(rate, capacity)
+            bucket = self._buckets[key] = TokenBucket(tokens=capacity)
+        return bucket.take(rate, capacity, cost)
+
+    def _prune(self, rate: float, capacity: float):
+        """Drop buckets that have refilled; they behave the same as new ones"""
+        now = time.monotonic()
+        idle = capacity / rate
+        self._buckets = {
+            key: bucket for key, bucket in self._buckets.items()
+            if now - bucket.updated_at < idle
+        }
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class RateLimiter:
+    """Named token-bucket limit: `rate` requests per second with a `burst` allowance"""
+
+    def __init__(self, name: str, rate: float, burst: int, backend: Optional[RateLimitBackend] = None):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.backend = backend or MemoryRateLimitBackend()
+        self.allowed = 0
+        self.limited = 0
+
+    async def check(self, key: Optional[str], cost: float = 1.0):
+        """Raise 429 with Retry-After when `key` is over its limit"""
+        if not RATE_LIMIT_ENABLED or not key:
+            return
+        retry_after = await self.backend.consume(f"{self.name}:{key}", self.rate, self.burst, cost)
+        if retry_after <= 0:
+            self.allowed += 1
+            return
+        self.limited += 1
+        logger.warning(f"Rate limit '{self.name}' exceeded for {key}")
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests. Please slow down and try again shortly.",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+    def snapshot(self) -> dict:
+        return {
+            "rate_per_second": self.rate,
+            "burst": self.burst,
+            "allowed": self.allowed,
+            "limited": self.limited,
+            "tracked_keys": len(self.backend) if hasattr(self.backend, "__len__") else None
+        }
+
+
+class AdmissionController:
+    """Caps concurrent in-flight writes and sheds requests that wait too long for a slot"""
+
+    def __init__(self, name: str, max_in_flight: int, max_wait: float, retry_after: int = 1):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_wait = max_wait
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one write slot for the duration of the block, or raise 503"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait)
+        except asyncio.TimeoutError:
+            self.shed += 1
+            logger.warning(f"Admission '{self.name}' shed a request after waiting {self.max_wait}s")
+            raise HTTPException(
+                status_code=503,
+                detail="We're receiving a lot of messages right now. Please try again shortly.",
+                headers={"Retry-After": str(self.retry_after)}
+            )
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def snapshot(self) -> dict:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_wait_seconds": self.max_wait,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "shed": self.shed
+        }
+
+
+def client_ip(request: Request) -> Optional[str]:
+    """Client address for rate limiting, or None when it can't be trusted"""
+    if RATE_LIMIT_CLIENT_IP == "forwarded":
+        forwarded = request.headers.get("x-forwarded-for")
+        return forwarded.split(",")[0].strip() if forwarded else None
+    if RATE_LIMIT_CLIENT_IP == "client":
+        return request.client.host if request.client else None
+    return None
+
+
+# Public contact form: a short burst per visitor, then a steady trickle
+contact_ip_limiter = RateLimiter(
+    "contact_ip",
+    rate=env_float("CONTACT_RATE_LIMIT_IP_PER_MINUTE", 10.0) / 60,
+    burst=env_int("CONTACT_RATE_LIMIT_IP_BURST", 5)
+)
+contact_email_limiter = RateLimiter(
+    "contact_email",
+    rate=env_float("CONTACT_RATE_LIMIT_EMAIL_PER_HOUR", 10.0) / 3600,
+    burst=env_int("CONTACT_RATE_LIMIT_EMAIL_BURST", 3)
+)
+
+# Shared cap on concurrent contact writes, well below the pool size so reads keep connections
+write_admission = AdmissionController(
+    "db_writes",
+    max_in_flight=env_int("WRITE_ADMISSION_MAX_IN_FLIGHT", 32),
+    max_wait=env_float("WRITE_ADMISSION_MAX_WAIT", 0.5)
+)
+
+rate_limiters = {limiter.name: limiter for limiter in (contact_ip_limiter, contact_email_limiter)}
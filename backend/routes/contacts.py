@@ -1,6 +1,15 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import List, Optional
-from datetime import datetime
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError
+from typing import List, Optional, Tuple
+from datetime import datetime, timedelta
+import asyncio
+import base64
+import csv
+import io
+import json
 import logging
 
 from models import (
@@ -8,36 +17,94 @@ from models import (
     ContactSubmissionCreate, 
     ContactResponse, 
     APIResponse,
-    ContactStatus
+    ContactStatus,
+    ContactStatusBulkUpdate,
+    CONTACT_PROJECTION
 )
-from database import get_database
+from database import get_database, get_read_database
+from cache import ResponseCache, CachedPayload
+from compression import cached_response
+from config import env_float, env_int
+from write_behind import contact_write_queue, QueueFullError
+from counters import (
+    bump_collection_version,
+    record_contacts_created,
+    record_contact_status_change,
+    record_contact_status_changes
+)
+from search import record_schools, suggest_schools, text_search_query
+from serialization import TRUSTED_DB_READS, api_envelope, dumps, json_response
+from ratelimit import client_ip, contact_email_limiter, contact_ip_limiter, write_admission
+from idempotency import IDEMPOTENCY_TTL, Claim, digest, idempotency_store
+from invalidation import invalidation_bus
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/contacts", tags=["contacts"])
 
+# Newest first, with id as a tiebreaker so keyset pages are stable
+CONTACT_SORT = [("created_at", -1), ("id", -1)]
+
+# Filtered totals for count=estimated, refreshed every few seconds
+contact_count_cache = ResponseCache(
+    "contact_counts",
+    ttl=env_float("CONTACT_COUNT_CACHE_TTL", 30.0),
+    max_entries=env_int("CONTACT_COUNT_CACHE_MAX_ENTRIES", 1024)
+)
+
+# Dashboards poll analytics every few seconds; aggregate at most once per window
+analytics_cache = ResponseCache(
+    "contact_analytics",
+    ttl=env_float("CONTACT_ANALYTICS_CACHE_TTL", 15.0),
+    max_entries=env_int("CONTACT_ANALYTICS_CACHE_MAX_ENTRIES", 256)
+)
+
+# New submissions show up once the count and analytics TTLs pass; status changes
+# evict at once. Inserts also move updated_at, so polling follows the contacts
+# version, which only status updates bump
+STATUS_CHANGES = {"operationType": {"$ne": "insert"}}
+invalidation_bus.watch("contact_submissions", contact_count_cache, match=STATUS_CHANGES, poll_version=True)
+invalidation_bus.watch("contact_submissions", analytics_cache, match=STATUS_CHANGES, poll_version=True)
+
+# Identical (email, message) submissions within this window are treated as one
+CONTACT_DUPLICATE_WINDOW = env_int("CONTACT_DUPLICATE_WINDOW_SECONDS", 600)
+
+# Bulk ingest limits
+BULK_CHUNK_SIZE = env_int("CONTACT_BULK_CHUNK_SIZE", 500)
+BULK_MAX_ROWS = env_int("CONTACT_BULK_MAX_ROWS", 10000)
+BULK_MAX_BYTES = env_int("CONTACT_BULK_MAX_BYTES", 16 * 1024 * 1024)
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+# Rows per Motor batch (and per streamed chunk) for exports
+EXPORT_BATCH_SIZE = env_int("CONTACT_EXPORT_BATCH_SIZE", 1000)
+EXPORT_FIELDS = [field for field in ContactSubmission.model_fields]
+
 @router.post("/", response_model=ContactResponse)
-async def create_contact_submission(contact_data: ContactSubmissionCreate):
+async def create_contact_submission(
+    contact_data: ContactSubmissionCreate,
+    request: Request,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255)
+):
     """Submit a contact form"""
     try:
-        db = await get_database()
-        
-        # Create contact submission
-        contact_dict = contact_data.dict()
-        contact_obj = ContactSubmission(**contact_dict)
+        # Retries and double submits get the original response instead of a second contact
+        claims = contact_claims(contact_data, idempotency_key)
+        replay = await idempotency_store.lookup(claims)
+        if replay is None:
+            # Throttle per visitor and per address before anything is written
+            await contact_ip_limiter.check(client_ip(request))
+            await contact_email_limiter.check(contact_data.email.lower())
+            
+            # One write slot covers the claims, the contact, its counters and the stored response
+            async with write_admission.slot():
+                replay = await idempotency_store.claim(claims)
+                if replay is None:
+                    return await save_claimed_submission(contact_data, claims)
         
-        # Insert into database
-        result = await db.contact_submissions.insert_one(contact_obj.dict())
-        
-        if result.inserted_id:
-            logger.info(f"New contact submission created: {contact_obj.id}")
-            return ContactResponse(
-                success=True,
-                message="Thank you for your message! We'll get back to you within 24 hours.",
-                data=contact_obj
-            )
-        else:
-            raise HTTPException(status_code=500, detail="Failed to save contact submission")
+        logger.info(f"Replayed contact submission: {replay['data']['id']}")
+        return json_response(replay, headers={"Idempotent-Replayed": "true"})
             
+    except HTTPException:
+        raise
     except ValueError as e:
         logger.error(f"Validation error in contact submission: {str(e)}")
         raise HTTPException(status_code=400, detail=str(e))
@@ -45,49 +112,560 @@ async def create_contact_submission(contact_data: ContactSubmissionCreate):
         logger.error(f"Error creating contact submission: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+def contact_claims(contact_data: ContactSubmissionCreate, idempotency_key: Optional[str]) -> List[Claim]:
+    """Idempotency claims for a submission: the client key, then the (email, message) content"""
+    claims = []
+    if idempotency_key:
+        claims.append(Claim(
+            key=f"contact:key:{digest(idempotency_key)}",
+            ttl=IDEMPOTENCY_TTL,
+            fingerprint=digest(contact_data.model_dump_json())
+        ))
+    if CONTACT_DUPLICATE_WINDOW > 0:
+        claims.append(Claim(
+            key=f"contact:content:{digest(contact_data.email, ' '.join(contact_data.message.split()))}",
+            ttl=CONTACT_DUPLICATE_WINDOW
+        ))
+    return claims
+
+async def save_claimed_submission(contact_data: ContactSubmissionCreate, claims: List[Claim]) -> ContactResponse:
+    """Save a submission whose claims are held, storing the response for replays"""
+    try:
+        response = await save_contact_submission(contact_data)
+    except BaseException:
+        await idempotency_store.release(claims)
+        raise
+    
+    await idempotency_store.complete(claims, response.model_dump(mode="json"))
+    return response
+
+async def save_contact_submission(contact_data: ContactSubmissionCreate) -> ContactResponse:
+    """Queue or insert a new submission and build its response"""
+    # Create contact submission (input is already validated)
+    contact_obj = contact_data.to_submission()
+    
+    if contact_write_queue.running:
+        # Acknowledge once queued; the background task writes it in a batch
+        try:
+            await contact_write_queue.put(contact_obj.model_dump())
+        except QueueFullError:
+            raise HTTPException(
+                status_code=503,
+                detail="We're receiving a lot of messages right now. Please try again shortly.",
+                headers={"Retry-After": "1"}
+            )
+        logger.info(f"New contact submission queued: {contact_obj.id}")
+    else:
+        # Insert into database
+        db = await get_database()
+        result = await db.contact_submissions.insert_one(contact_obj.model_dump())
+        if not result.inserted_id:
+            raise HTTPException(status_code=500, detail="Failed to save contact submission")
+        # Independent derived updates, so they share one round trip of latency
+        await asyncio.gather(record_contacts_created(), record_schools([contact_obj.school]))
+        logger.info(f"New contact submission created: {contact_obj.id}")
+    
+    return ContactResponse(
+        success=True,
+        message="Thank you for your message! We'll get back to you within 24 hours.",
+        data=contact_obj
+    )
+
+@router.post("/bulk", response_model=APIResponse)
+async def create_contact_submissions_bulk(request: Request):
+    """Submit a batch of contact forms as a JSON array or NDJSON (partner endpoint)"""
+    try:
+        await contact_ip_limiter.check(client_ip(request))
+        db = await get_database()
+        
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        ndjson = content_type in NDJSON_CONTENT_TYPES
+        rows, errors = parse_bulk_rows(await read_bulk_body(request, ndjson), ndjson)
+        received = len(rows) + len(errors)
+        
+        if received > BULK_MAX_ROWS:
+            raise HTTPException(status_code=413, detail=f"Batches are limited to {BULK_MAX_ROWS} rows")
+        
+        # Validate every row in one pass, keeping the row index for error reports
+        documents = []
+        for index, row in rows:
+            try:
+                contact_obj = ContactSubmissionCreate(**row).to_submission()
+                documents.append((index, contact_obj.model_dump()))
+            except ValidationError as e:
+                errors.append({"index": index, "error": format_validation_error(e)})
+        
+        # Unordered inserts so one bad row doesn't stop the rest of its chunk;
+        # the batch and its counter updates hold a single write slot so it can't be shed halfway
+        inserted = 0
+        async with write_admission.slot():
+            for start in range(0, len(documents), BULK_CHUNK_SIZE):
+                chunk = documents[start:start + BULK_CHUNK_SIZE]
+                try:
+                    result = await db.contact_submissions.insert_many(
+                        [doc for _, doc in chunk],
+                        ordered=False
+                    )
+                    inserted += len(result.inserted_ids)
+                except BulkWriteError as e:
+                    inserted += e.details.get("nInserted", 0)
+                    for write_error in e.details.get("writeErrors", []):
+                        errors.append({
+                            "index": chunk[write_error["index"]][0],
+                            "error": write_error.get("errmsg", "Write failed")
+                        })
+            
+            if inserted:
+                failed = {error["index"] for error in errors}
+                await asyncio.gather(
+                    record_contacts_created(inserted),
+                    record_schools(doc.get("school") for index, doc in documents if index not in failed)
+                )
+        errors.sort(key=lambda error: error["index"])
+        logger.info(f"Bulk contact ingest: {inserted} inserted, {len(errors)} failed")
+        
+        return APIResponse(
+            success=not errors,
+            message=f"Saved {inserted} of {received} contact submissions",
+            data={
+                "received": received,
+                "inserted": inserted,
+                "failed": len(errors),
+                "errors": errors
+            }
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error in bulk contact submission: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+async def read_bulk_body(request: Request, ndjson: bool) -> bytes:
+    """Read a bulk body, rejecting it with 413 as soon as it is over the byte or row limit"""
+    too_large = HTTPException(
+        status_code=413,
+        detail=f"Batches are limited to {BULK_MAX_ROWS} rows and {BULK_MAX_BYTES} bytes"
+    )
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > BULK_MAX_BYTES:
+        raise too_large
+    
+    # Stream the body so an oversized upload is never held in memory whole
+    chunks, size, lines, partial = [], 0, 0, b""
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > BULK_MAX_BYTES:
+            raise too_large
+        chunks.append(chunk)
+        if ndjson:
+            # Count complete non-empty lines; the last piece may continue in the next chunk
+            pieces = (partial + chunk).split(b"\n")
+            partial = pieces.pop()
+            lines += sum(1 for piece in pieces if piece.strip())
+            if lines > BULK_MAX_ROWS:
+                raise too_large
+    return b"".join(chunks)
+
+def parse_bulk_rows(body: bytes, ndjson: bool) -> Tuple[List[Tuple[int, dict]], List[dict]]:
+    """Split a bulk body into (index, row) pairs and per-row parse errors"""
+    rows, errors = [], []
+    
+    if ndjson:
+        lines = [line for line in body.splitlines() if line.strip()]
+        for index, line in enumerate(lines):
+            try:
+                rows.append((index, json.loads(line)))
+            except ValueError:
+                errors.append({"index": index, "error": "Invalid JSON"})
+    else:
+        try:
+            items = json.loads(body)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Request body must be a JSON array or NDJSON")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Request body must be a JSON array or NDJSON")
+        rows = list(enumerate(items))
+    
+    valid_rows = []
+    for index, row in rows:
+        if isinstance(row, dict):
+            valid_rows.append((index, row))
+        else:
+            errors.append({"index": index, "error": "Row must be a JSON object"})
+    return valid_rows, errors
+
+def format_validation_error(error: ValidationError) -> str:
+    """Flatten a pydantic error into a single readable message"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc']) or 'row'}: {item['msg']}"
+        for item in error.errors()
+    )
+
 @router.get("/", response_model=APIResponse)
 async def get_contact_submissions(
     status: Optional[ContactStatus] = None,
     limit: int = Query(50, ge=1, le=100),
-    page: int = Query(1, ge=1)
+    page: int = Query(1, ge=1),
+    use_cursor: bool = Query(False, alias="cursor", description="Use keyset pagination instead of pages"),
+    after: Optional[str] = Query(None, description="Opaque cursor from a previous response"),
+    count: str = Query("exact", pattern="^(exact|estimated|none)$"),
+    q: Optional[str] = Query(None, min_length=2, max_length=200, description="Keyword search on name, school and message")
 ):
     """Get contact submissions (admin endpoint)"""
     try:
-        db = await get_database()
+        db = await get_read_database()
         
         # Build query
         query = {}
         if status:
             query["status"] = status.value
         
+        projection, sort = CONTACT_PROJECTION, CONTACT_SORT
+        if q:
+            # Relevance-ranked keyword search through the text index
+            query["$text"] = text_search_query(q)
+            projection = {**CONTACT_PROJECTION, "score": {"$meta": "textScore"}}
+            sort = [("score", {"$meta": "textScore"})]
+        
+        if use_cursor or after:
+            if q:
+                raise HTTPException(status_code=400, detail="Cursor pagination is not supported with q")
+            return await get_contact_submissions_page_after(db, query, limit, after, count)
+        
         # Calculate skip for pagination
         skip = (page - 1) * limit
         
         # Get submissions
-        cursor = db.contact_submissions.find(query).sort("created_at", -1).skip(skip).limit(limit)
+        cursor = (
+            db.contact_submissions.find(query, projection)
+            .sort(sort).skip(skip).limit(limit)
+        )
         submissions = await cursor.to_list(length=limit)
         
-        # Convert to model objects
-        contact_list = [ContactSubmission(**sub) for sub in submissions]
-        
         # Get total count for pagination
-        total_count = await db.contact_submissions.count_documents(query)
+        total_count = await count_contact_submissions(db, query, count)
+        
+        return contact_page_response(submissions, {
+            "page": page,
+            "limit": limit,
+            "total": total_count,
+            "pages": (total_count + limit - 1) // limit if total_count is not None else None
+        })
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching contact submissions: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+async def get_contact_submissions_page_after(db, query: dict, limit: int, after: Optional[str], count: str):
+    """Keyset page of submissions ordered by (created_at, id) descending"""
+    page_query = dict(query)
+    if after:
+        created_at, contact_id = decode_contact_cursor(after)
+        page_query["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "id": {"$lt": contact_id}}
+        ]
+    
+    # Fetch one extra row to know whether another page exists
+    cursor = db.contact_submissions.find(page_query, CONTACT_PROJECTION).sort(CONTACT_SORT).limit(limit + 1)
+    submissions = await cursor.to_list(length=limit + 1)
+    has_more = len(submissions) > limit
+    submissions = submissions[:limit]
+    
+    next_cursor = None
+    if has_more and submissions:
+        last = submissions[-1]
+        next_cursor = encode_contact_cursor(last["created_at"], last["id"])
+    
+    return contact_page_response(submissions, {
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+        "total": await count_contact_submissions(db, query, count)
+    })
+
+def contact_page_response(submissions: List[dict], pagination: dict):
+    """Serialize a page of stored submissions, validating only when untrusted"""
+    # Text searches project the relevance score only to sort by it
+    for submission in submissions:
+        submission.pop("score", None)
+    
+    if TRUSTED_DB_READS:
+        return json_response(api_envelope({"submissions": submissions, "pagination": pagination}))
+    
+    # Convert to model objects
+    contact_list = [ContactSubmission(**sub) for sub in submissions]
+    return APIResponse(
+        success=True,
+        data={
+            "submissions": [sub.model_dump() for sub in contact_list],
+            "pagination": pagination
+        }
+    )
+
+def encode_contact_cursor(created_at: datetime, contact_id: str) -> str:
+    """Encode a (created_at, id) position as an opaque token"""
+    raw = json.dumps([created_at.isoformat(), contact_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_contact_cursor(token: str) -> Tuple[datetime, str]:
+    """Decode a cursor token back into its (created_at, id) position"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        created_at, contact_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), str(contact_id)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor") from e
+
+async def count_contact_submissions(db, query: dict, mode: str) -> Optional[int]:
+    """Count submissions exactly, from estimates/cache, or not at all"""
+    if mode == "none":
+        return None
+    if mode == "exact":
+        return await db.contact_submissions.count_documents(query)
+    
+    # Unfiltered totals come from collection metadata in constant time
+    if not query:
+        return await db.contact_submissions.estimated_document_count()
+    
+    # Free-text searches rarely repeat, so caching them would only churn the cache
+    if "$text" in query:
+        return await db.contact_submissions.count_documents(query)
+    
+    # Counts are cached as their decimal text
+    async def load_count() -> CachedPayload:
+        total = await db.contact_submissions.count_documents(query)
+        return CachedPayload(body=str(total).encode())
+    
+    key = json.dumps(query, sort_keys=True)
+    payload = await contact_count_cache.get_or_load(key, load_count)
+    return int(payload.body)
+
+@router.get("/export")
+async def export_contact_submissions(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    since: Optional[datetime] = Query(None, description="Only rows updated at or after this time"),
+    status: Optional[ContactStatus] = None
+):
+    """Stream contact submissions as NDJSON or CSV (admin endpoint)"""
+    try:
+        db = await get_read_database()
+        
+        # Build query
+        query = {}
+        if since:
+            # Inclusive so rows sharing the last exported timestamp aren't skipped
+            query["updated_at"] = {"$gte": since}
+        if status:
+            query["status"] = status.value
+        
+        # Oldest change first, so the last row's updated_at is the next `since`
+        cursor = (
+            db.contact_submissions.find(query, CONTACT_PROJECTION)
+            .sort([("updated_at", 1), ("id", 1)])
+            .batch_size(EXPORT_BATCH_SIZE)
+        )
+        
+        if format == "csv":
+            body, media_type = stream_contacts_csv(cursor), "text/csv"
+        else:
+            body, media_type = stream_contacts_ndjson(cursor), "application/x-ndjson"
+        
+        filename = f"contacts-{datetime.utcnow():%Y%m%dT%H%M%SZ}.{format}"
+        return StreamingResponse(
+            body,
+            media_type=media_type,
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+        
+    except Exception as e:
+        logger.error(f"Error exporting contact submissions: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+async def stream_contacts_ndjson(cursor):
+    """Yield NDJSON chunks of at most EXPORT_BATCH_SIZE rows"""
+    exported = 0
+    lines = []
+    try:
+        async for doc in cursor:
+            lines.append(dumps(doc))
+            if len(lines) >= EXPORT_BATCH_SIZE:
+                exported += len(lines)
+                yield b"\n".join(lines) + b"\n"
+                lines = []
+        if lines:
+            exported += len(lines)
+            yield b"\n".join(lines) + b"\n"
+        logger.info(f"Exported {exported} contact submissions as NDJSON")
+    except Exception as e:
+        logger.error(f"Contact export stopped after {exported} rows: {str(e)}")
+        raise
+    finally:
+        await cursor.close()
+
+async def stream_contacts_csv(cursor):
+    """Yield CSV chunks of at most EXPORT_BATCH_SIZE rows, header first"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    exported = 0
+    rows = 0
+    try:
+        async for doc in cursor:
+            writer.writerow({
+                key: value.isoformat() if isinstance(value, datetime) else value
+                for key, value in doc.items()
+            })
+            rows += 1
+            if rows >= EXPORT_BATCH_SIZE:
+                exported += rows
+                rows = 0
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        exported += rows
+        yield buffer.getvalue().encode()
+        logger.info(f"Exported {exported} contact submissions as CSV")
+    except Exception as e:
+        logger.error(f"Contact export stopped after {exported} rows: {str(e)}")
+        raise
+    finally:
+        await cursor.close()
+
+@router.get("/schools/suggest", response_model=APIResponse)
+async def suggest_contact_schools(
+    prefix: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=25)
+):
+    """Autocomplete school names from the precomputed lookup table"""
+    try:
+        return json_response(api_envelope(await suggest_schools(prefix, limit)))
+        
+    except Exception as e:
+        logger.error(f"Error suggesting school names: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/analytics", response_model=APIResponse)
+async def get_contact_analytics(
+    request: Request,
+    days: int = Query(30, ge=1, le=365),
+    top_schools: int = Query(10, ge=1, le=50)
+):
+    """Get contact counts by status, day, week and school (admin endpoint)"""
+    try:
+        payload = await analytics_cache.get_or_load(
+            (days, top_schools),
+            lambda: load_contact_analytics(days, top_schools)
+        )
+        return cached_response(request, payload)
+        
+    except Exception as e:
+        logger.error(f"Error fetching contact analytics: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+async def load_contact_analytics(days: int, top_schools: int) -> CachedPayload:
+    """Aggregate submissions from the last `days` days in one pipeline"""
+    db = await get_read_database()
+    since = datetime.utcnow() - timedelta(days=days)
+    
+    # The range match is served by the created_at index; $facet shares the scan
+    pipeline = [
+        {"$match": {"created_at": {"$gte": since}}},
+        {"$facet": {
+            "total": [{"$count": "count"}],
+            "by_status": [
+                {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+            ],
+            "per_day": [
+                {"$group": {
+                    "_id": {"$dateTrunc": {"date": "$created_at", "unit": "day"}},
+                    "count": {"$sum": 1}
+                }},
+                {"$sort": {"_id": 1}}
+            ],
+            "per_week": [
+                {"$group": {
+                    "_id": {"$dateTrunc": {"date": "$created_at", "unit": "week", "startOfWeek": "monday"}},
+                    "count": {"$sum": 1}
+                }},
+                {"$sort": {"_id": 1}}
+            ],
+            "top_schools": [
+                {"$match": {"school": {"$nin": [None, ""]}}},
+                {"$group": {"_id": "$school", "count": {"$sum": 1}}},
+                {"$sort": {"count": -1, "_id": 1}},
+                {"$limit": top_schools}
+            ]
+        }}
+    ]
+    
+    results = await db.contact_submissions.aggregate(pipeline).to_list(length=1)
+    facets = results[0] if results else {}
+    
+    by_status = {status.value: 0 for status in ContactStatus}
+    for row in facets.get("by_status", []):
+        by_status[row["_id"]] = row["count"]
+    
+    total = facets.get("total", [])
+    analytics = {
+        "days": days,
+        "since": since,
+        "total": total[0]["count"] if total else 0,
+        "by_status": by_status,
+        "per_day": [{"date": row["_id"], "count": row["count"]} for row in facets.get("per_day", [])],
+        "per_week": [{"week": row["_id"], "count": row["count"]} for row in facets.get("per_week", [])],
+        "top_schools": [{"school": row["_id"], "count": row["count"]} for row in facets.get("top_schools", [])]
+    }
+    return CachedPayload(body=dumps(api_envelope(analytics)))
+
+@router.patch("/status", response_model=APIResponse)
+async def update_contact_statuses(update: ContactStatusBulkUpdate):
+    """Set the status of many contact submissions at once (admin endpoint)"""
+    try:
+        db = await get_database()
+        
+        query = {"id": {"$in": update.ids}} if update.ids is not None else update.filter.to_query()
+        target = update.status.value
+        changes = {"$set": {"status": target, "updated_at": datetime.utcnow()}}
+        
+        # Selected rows already at the target aren't updated; count them before
+        # the updates below move more rows into the target status
+        already = 0
+        if query.get("status", target) == target:
+            already = await db.contact_submissions.count_documents({**query, "status": target})
+        
+        # One update_many per previous status, run concurrently, so the status
+        # counters move by exactly what each one modified
+        sources = [status.value for status in ContactStatus if status != update.status]
+        if "status" in query:
+            sources = [status for status in sources if status == query["status"]]
+        results = await asyncio.gather(
+            *(db.contact_submissions.update_many({**query, "status": status}, changes) for status in sources)
+        )
+        moved = dict(zip(sources, (result.modified_count for result in results)))
+        modified = sum(moved.values())
+        matched = already + sum(result.matched_count for result in results)
+        
+        await record_contact_status_changes(moved, update.status)
+        if modified:
+            await bump_collection_version("contact_submissions")
+            contact_count_cache.invalidate()
+            analytics_cache.invalidate()
+        logger.info(f"Bulk status update to {target}: {matched} matched, {modified} modified")
         
         return APIResponse(
             success=True,
-            data={
-                "submissions": [sub.dict() for sub in contact_list],
-                "pagination": {
-                    "page": page,
-                    "limit": limit,
-                    "total": total_count,
-                    "pages": (total_count + limit - 1) // limit
-                }
-            }
+            message=f"Updated {modified} contact submissions to {target}",
+            data={"matched": matched, "modified": modified, "by_previous_status": moved}
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error fetching contact submissions: {str(e)}")
+        logger.error(f"Error updating contact statuses: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.patch("/{contact_id}/status")
@@ -96,20 +674,25 @@ async def update_contact_status(contact_id: str, status: ContactStatus):
     try:
         db = await get_database()
         
-        # Update status
-        result = await db.contact_submissions.update_one(
+        # Update status, reading the previous one for the status counters
+        previous = await db.contact_submissions.find_one_and_update(
             {"id": contact_id},
             {
                 "$set": {
                     "status": status.value,
                     "updated_at": datetime.utcnow()
                 }
-            }
+            },
+            projection={"_id": 0, "status": 1},
+            return_document=ReturnDocument.BEFORE
         )
         
-        if result.matched_count == 0:
+        if previous is None:
             raise HTTPException(status_code=404, detail="Contact submission not found")
         
+        await record_contact_status_change(previous.get("status", ContactStatus.NEW), status)
+        await bump_collection_version("contact_submissions")
+        
         return APIResponse(
             success=True,
             message=f"Contact status updated to {status.value}"
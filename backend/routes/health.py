@@ -0,0 +1,38 @@
+from fastapi import APIRouter
+import logging
+
+from health import HEALTH_DEGRADED_STATUS_CODE, mongo_probe, startup
+from serialization import api_envelope, json_response
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/health", tags=["health"])
+
+@router.get("/live")
+async def liveness():
+    """Process is up and serving requests (orchestrator liveness probe)"""
+    return json_response(api_envelope({"status": "alive", "uptime_seconds": round(startup.uptime, 3)}))
+
+@router.get("/ready")
+async def readiness():
+    """Warm-up finished and MongoDB answers pings (orchestrator readiness probe)
+
+    Reads only the cached background probe, so it costs no database round trips.
+    """
+    status = current_status()
+    data = {"status": status, "startup": startup.snapshot(), "mongo": mongo_probe.snapshot()}
+    
+    if status in ("starting", "down"):
+        error = "Application is still starting" if status == "starting" else "MongoDB is unreachable"
+        return json_response(
+            {"success": False, "message": None, "data": data, "error": error},
+            status_code=503
+        )
+    if status == "degraded":
+        return json_response(api_envelope(data, "MongoDB is responding slowly"), status_code=HEALTH_DEGRADED_STATUS_CODE)
+    return json_response(api_envelope(data))
+
+def current_status() -> str:
+    """starting, down, degraded or ok"""
+    if not startup.ready:
+        return "starting"
+    return mongo_probe.status
@@ -1,34 +1,58 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from pymongo import ReturnDocument
 from datetime import datetime
 import logging
 
-from models import SchoolStats, StatsResponse
-from database import get_database
+from models import SchoolStats, StatsResponse, STATS_PROJECTION
+from database import get_database, get_read_database
+from cache import ResponseCache, CachedPayload
+from compression import cached_response
+from config import env_float
+from serialization import TRUSTED_DB_READS, api_envelope, dumps, model_from_db
+from counters import CURRENT_STATS_SORT, NON_COUNTER_CHANGES, stats_defaults, with_derived_counters
+from invalidation import invalidation_bus
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/stats", tags=["statistics"])
 
+# Stats change about once a day, so serve them from memory, and keep serving
+# the last good copy (refreshed in the background) if MongoDB is slow or down
+stats_cache = ResponseCache(
+    "stats",
+    ttl=env_float("STATS_CACHE_TTL", 60.0),
+    stale_ttl=env_float("STATS_CACHE_STALE_TTL", 3600.0)
+)
+STATS_CACHE_KEY = "latest"
+# Counter $incs don't touch last_updated, so polling skips them the same way
+invalidation_bus.watch("school_stats", stats_cache, timestamp_field="last_updated", match=NON_COUNTER_CHANGES)
+
+async def load_stats_payload() -> CachedPayload:
+    """Read the stats document (counters included) and serialize the response"""
+    db = await get_read_database()
+    
+    # Get latest stats
+    stats_doc = await db.school_stats.find_one({}, STATS_PROJECTION, sort=CURRENT_STATS_SORT)
+    
+    if stats_doc:
+        stats_doc = with_derived_counters(stats_doc)
+        if TRUSTED_DB_READS:
+            return CachedPayload(body=dumps(api_envelope(stats_doc)))
+        stats = SchoolStats(**stats_doc)
+    else:
+        # Create default stats if none exist
+        stats = SchoolStats()
+        await db.school_stats.insert_one(stats.model_dump(exclude={"average_rating"}))
+        logger.info("Created default school statistics")
+    
+    body = StatsResponse(success=True, data=stats).model_dump_json()
+    return CachedPayload(body=body.encode())
+
 @router.get("/", response_model=StatsResponse)
-async def get_school_statistics():
+async def get_school_statistics(request: Request):
     """Get school statistics for display on website"""
     try:
-        db = await get_database()
-        
-        # Get latest stats
-        stats_doc = await db.school_stats.find_one(sort=[("last_updated", -1)])
-        
-        if stats_doc:
-            stats = SchoolStats(**stats_doc)
-        else:
-            # Create default stats if none exist
-            stats = SchoolStats()
-            await db.school_stats.insert_one(stats.dict())
-            logger.info("Created default school statistics")
-        
-        return StatsResponse(
-            success=True,
-            data=stats
-        )
+        payload = await stats_cache.get_or_load(STATS_CACHE_KEY, load_stats_payload)
+        return cached_response(request, payload, headers=stats_cache.freshness_headers(STATS_CACHE_KEY, payload))
         
     except Exception as e:
         logger.error(f"Error fetching school statistics: {str(e)}")
@@ -40,30 +64,24 @@ async def update_school_statistics(stats_data: dict):
     try:
         db = await get_database()
         
-        # Get current stats
-        current_stats = await db.school_stats.find_one(sort=[("last_updated", -1)])
+        update_data = {
+            **stats_data,
+            "last_updated": datetime.utcnow()
+        }
+        update_data.pop("_id", None)
         
-        if current_stats:
-            # Update existing stats
-            update_data = {
-                **stats_data,
-                "last_updated": datetime.utcnow()
-            }
-            
-            result = await db.school_stats.update_one(
-                {"id": current_stats["id"]},
-                {"$set": update_data}
-            )
-            
-            # Get updated stats
-            updated_doc = await db.school_stats.find_one({"id": current_stats["id"]})
-            stats = SchoolStats(**updated_doc)
-        else:
-            # Create new stats
-            stats_dict = {**SchoolStats().dict(), **stats_data}
-            stats = SchoolStats(**stats_dict)
-            await db.school_stats.insert_one(stats.dict())
+        # Update the current stats (or create them) in a single round trip
+        updated_doc = await db.school_stats.find_one_and_update(
+            {},
+            {"$set": update_data, "$setOnInsert": stats_defaults(exclude=update_data)},
+            sort=CURRENT_STATS_SORT,
+            projection=STATS_PROJECTION,
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        stats = model_from_db(SchoolStats, with_derived_counters(updated_doc))
         
+        stats_cache.invalidate()
         logger.info("School statistics updated successfully")
         
         return StatsResponse(
@@ -74,4 +92,4 @@ async def update_school_statistics(stats_data: dict):
         
     except Exception as e:
         logger.error(f"Error updating school statistics: {str(e)}")
-        raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="Internal server error")
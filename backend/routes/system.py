@@ -0,0 +1,56 @@
+from fastapi import APIRouter
+import logging
+
+from models import APIResponse
+from cache import caches
+from database import pool_monitor
+from write_behind import contact_write_queue
+from ratelimit import RATE_LIMIT_CLIENT_IP, rate_limiters, write_admission
+from idempotency import idempotency_store, idempotency_write_queue
+from invalidation import invalidation_bus
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/system", tags=["system"])
+
+@router.get("/cache", response_model=APIResponse)
+async def get_cache_statistics():
+    """Get hit/miss counters for the in-process caches (admin endpoint)"""
+    return APIResponse(
+        success=True,
+        data={name: cache.snapshot() for name, cache in caches.items()}
+    )
+
+@router.get("/invalidation", response_model=APIResponse)
+async def get_invalidation_statistics():
+    """Get the cross-worker cache invalidation mode and counters (admin endpoint)"""
+    return APIResponse(success=True, data=invalidation_bus.snapshot())
+
+@router.get("/queues", response_model=APIResponse)
+async def get_queue_statistics():
+    """Get depth and flush counters for write-behind queues (admin endpoint)"""
+    return APIResponse(
+        success=True,
+        data={
+            queue.collection_name: queue.snapshot()
+            for queue in (contact_write_queue, idempotency_write_queue)
+        }
+    )
+
+@router.get("/pool", response_model=APIResponse)
+async def get_pool_statistics():
+    """Get MongoDB connection pool checkout wait times (admin endpoint)"""
+    return APIResponse(success=True, data=pool_monitor.snapshot())
+
+
+@router.get("/limits", response_model=APIResponse)
+async def get_limit_statistics():
+    """Get rate limiter and write admission counters (admin endpoint)"""
+    return APIResponse(
+        success=True,
+        data={
+            "rate_limits": {name: limiter.snapshot() for name, limiter in rate_limiters.items()},
+            "client_ip_source": RATE_LIMIT_CLIENT_IP,
+            "admission": {write_admission.name: write_admission.snapshot()},
+            "idempotency": idempotency_store.snapshot()
+        }
+    )
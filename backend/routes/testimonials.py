@@ -1,45 +1,97 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from typing import List, Optional
+from datetime import datetime
 import logging
 
 from models import (
     SchoolTestimonial, 
     TestimonialCreate, 
     TestimonialsResponse, 
-    APIResponse
+    APIResponse,
+    TESTIMONIAL_PROJECTION
 )
-from database import get_database
+from database import get_database, get_read_database
+from cache import ResponseCache, CachedPayload, etag_matches
+from compression import cached_response
+from config import env_float
+from counters import (
+    bump_collection_version,
+    collection_version,
+    record_testimonial_created,
+    record_testimonial_toggled
+)
+from serialization import TRUSTED_DB_READS, api_envelope, dumps
+from invalidation import invalidation_bus
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/testimonials", tags=["testimonials"])
 
+# Materialized feeds keyed by (limit, active). ETags come from the shared
+# testimonials version in collection_versions, bumped by every testimonial
+# write, so every worker issues the same tag for the same content. Bumps
+# also evict the feeds, since a worker may have loaded between a write and
+# its bump.
+# Past the TTL feeds are served stale while they refresh, and kept as a
+# fallback for MongoDB outages until the stale TTL
+testimonials_cache = ResponseCache(
+    "testimonials",
+    ttl=env_float("TESTIMONIALS_CACHE_TTL", 300.0),
+    stale_ttl=env_float("TESTIMONIALS_CACHE_STALE_TTL", 86400.0)
+)
+invalidation_bus.watch("testimonials", testimonials_cache)
+invalidation_bus.watch_version("testimonials", testimonials_cache)
+
+def feed_etag(version: int, limit: int, active: bool) -> str:
+    """Strong ETag for a feed at a collection version"""
+    return f'"v{version}-{limit}-{int(active)}"'
+
+async def load_testimonials_feed(limit: int, active: bool) -> CachedPayload:
+    """Query testimonials and serialize the feed response"""
+    version = await collection_version("testimonials")
+    db = await get_read_database()
+    
+    # Build query
+    query = {}
+    if active:
+        query["is_active"] = True
+    
+    # Get testimonials
+    cursor = db.testimonials.find(query, TESTIMONIAL_PROJECTION).sort("created_at", -1).limit(limit)
+    testimonials = await cursor.to_list(length=limit)
+    
+    logger.info(f"Retrieved {len(testimonials)} testimonials")
+    
+    # A bump during the query means the body may be newer than `version`:
+    # serve it untagged and uncached rather than pin it to the old tag
+    settled = await collection_version("testimonials") == version
+    etag = feed_etag(version, limit, active) if settled else None
+    
+    if TRUSTED_DB_READS:
+        return CachedPayload(body=dumps(api_envelope(testimonials)), etag=etag, cacheable=settled)
+    
+    # Convert to model objects
+    testimonial_list = [SchoolTestimonial(**test) for test in testimonials]
+    body = TestimonialsResponse(success=True, data=testimonial_list).model_dump_json()
+    return CachedPayload(body=body.encode(), etag=etag, cacheable=settled)
+
 @router.get("/", response_model=TestimonialsResponse)
 async def get_testimonials(
+    request: Request,
     limit: int = Query(6, ge=1, le=20),
     active: bool = Query(True)
 ):
     """Get active testimonials for display on website"""
     try:
-        db = await get_database()
-        
-        # Build query
-        query = {}
-        if active:
-            query["is_active"] = True
+        key = (limit, active)
+        payload = await testimonials_cache.get_or_load(key, lambda: load_testimonials_feed(limit, active))
         
-        # Get testimonials
-        cursor = db.testimonials.find(query).sort("created_at", -1).limit(limit)
-        testimonials = await cursor.to_list(length=limit)
+        if payload.etag and etag_matches(request.headers.get("if-none-match"), payload.etag):
+            return Response(status_code=304, headers={"ETag": payload.etag, "Cache-Control": "no-cache"})
         
-        # Convert to model objects
-        testimonial_list = [SchoolTestimonial(**test) for test in testimonials]
-        
-        logger.info(f"Retrieved {len(testimonial_list)} testimonials")
-        
-        return TestimonialsResponse(
-            success=True,
-            data=testimonial_list
-        )
+        headers = {"Cache-Control": "no-cache", **testimonials_cache.freshness_headers(key, payload)}
+        if payload.etag:
+            headers["ETag"] = payload.etag
+        return cached_response(request, payload, headers=headers)
         
     except Exception as e:
         logger.error(f"Error fetching testimonials: {str(e)}")
@@ -52,18 +104,20 @@ async def create_testimonial(testimonial_data: TestimonialCreate):
         db = await get_database()
         
         # Create testimonial
-        testimonial_dict = testimonial_data.dict()
-        testimonial_obj = SchoolTestimonial(**testimonial_dict)
+        testimonial_obj = SchoolTestimonial(**testimonial_data.model_dump())
         
         # Insert into database
-        result = await db.testimonials.insert_one(testimonial_obj.dict())
+        result = await db.testimonials.insert_one(testimonial_obj.model_dump())
+        await bump_collection_version("testimonials")
+        testimonials_cache.invalidate()
         
         if result.inserted_id:
+            await record_testimonial_created(testimonial_obj.rating, testimonial_obj.is_active)
             logger.info(f"New testimonial created: {testimonial_obj.id}")
             return APIResponse(
                 success=True,
                 message="Testimonial created successfully",
-                data=testimonial_obj.dict()
+                data=testimonial_obj.model_dump()
             )
         else:
             raise HTTPException(status_code=500, detail="Failed to save testimonial")
@@ -89,13 +143,19 @@ async def toggle_testimonial_status(testimonial_id: str):
         # Toggle active status
         new_status = not testimonial.get("is_active", True)
         
+        # Only flip from the state we read so concurrent toggles can't double count
         result = await db.testimonials.update_one(
-            {"id": testimonial_id},
-            {"$set": {"is_active": new_status}}
+            {"id": testimonial_id, "is_active": {"$ne": new_status}},
+            {"$set": {"is_active": new_status, "updated_at": datetime.utcnow()}}
         )
+        if result.modified_count:
+            await bump_collection_version("testimonials")
+        testimonials_cache.invalidate()
         
         if result.matched_count == 0:
-            raise HTTPException(status_code=404, detail="Testimonial not found")
+            raise HTTPException(status_code=409, detail="Testimonial was modified concurrently, please retry")
+        
+        await record_testimonial_toggled(testimonial.get("rating", 5), new_status)
         
         return APIResponse(
             success=True,
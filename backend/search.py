@@ -0,0 +1,116 @@
+"""
+Contact search helpers and the school name lookup table
+
+School names seen on contact submissions are kept in the school_names
+collection, keyed by their lowercased form, so typeahead is an anchored
+prefix scan of the _id index instead of a scan of contact_submissions.
+Run this module to rebuild the lookup table:
+
+    python search.py
+"""
+import asyncio
+import logging
+import re
+from collections import Counter
+from typing import Iterable, List
+
+from pymongo import UpdateOne
+
+from database import get_database, get_read_database
+
+logger = logging.getLogger(__name__)
+
+TEXT_INDEX_NAME = "contact_text_search"
+TEXT_INDEX_FIELDS = [("name", "text"), ("school", "text"), ("message", "text")]
+TEXT_INDEX_WEIGHTS = {"name": 5, "school": 3, "message": 1}
+
+
+def normalize_school(name: str) -> str:
+    """Lookup key for a school name"""
+    return " ".join(name.split()).lower()
+
+
+def text_search_query(q: str) -> dict:
+    """$text filter for relevance-ranked keyword search"""
+    return {"$search": q}
+
+
+async def record_schools(names: Iterable[str]):
+    """Add school names from new submissions to the lookup table"""
+    counts = Counter()
+    display = {}
+    for name in names:
+        if name and name.strip():
+            key = normalize_school(name)
+            counts[key] += 1
+            display.setdefault(key, " ".join(name.split()))
+    if not counts:
+        return
+    try:
+        db = await get_database()
+        await db.school_names.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": key},
+                    {"$inc": {"count": count}, "$setOnInsert": {"name": display[key]}},
+                    upsert=True
+                )
+                for key, count in counts.items()
+            ],
+            ordered=False
+        )
+    except Exception as e:
+        # The table can be rebuilt with rebuild_school_lookup, so never fail the write
+        logger.error(f"Failed to update school lookup table: {str(e)}")
+
+
+async def suggest_schools(prefix: str, limit: int = 10) -> List[dict]:
+    """School names starting with prefix, most frequently seen first"""
+    db = await get_read_database()
+    cursor = (
+        db.school_names.find({"_id": {"$regex": f"^{re.escape(normalize_school(prefix))}"}})
+        .sort([("count", -1), ("_id", 1)])
+        .limit(limit)
+    )
+    return [{"name": doc["name"], "count": doc["count"]} async for doc in cursor]
+
+
+async def rebuild_school_lookup() -> int:
+    """Recreate the lookup table from contact_submissions"""
+    db = await get_database()
+    counts = Counter()
+    display = {}
+    async for row in db.contact_submissions.aggregate([
+        {"$match": {"school": {"$nin": [None, ""]}}},
+        {"$group": {"_id": "$school", "count": {"$sum": 1}}}
+    ]):
+        key = normalize_school(row["_id"])
+        counts[key] += row["count"]
+        display.setdefault(key, " ".join(row["_id"].split()))
+
+    await db.school_names.delete_many({})
+    if counts:
+        await db.school_names.insert_many(
+            [{"_id": key, "name": display[key], "count": count} for key, count in counts.items()],
+            ordered=False
+        )
+    logger.info(f"School lookup table rebuilt with {len(counts)} schools")
+    return len(counts)
+
+
+async def main():
+    from pathlib import Path
+    from dotenv import load_dotenv
+    from database import close_mongo_connection
+
+    load_dotenv(Path(__file__).parent / '.env')
+    try:
+        total = await rebuild_school_lookup()
+        print(f"Rebuilt school lookup table: {total} schools")
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -1,18 +1,32 @@
 """
 Seed script to populate initial data in the database
 Run this script to add initial testimonials and stats
+
+It can also generate synthetic contacts and testimonials at production
+volume for testing indexes and pagination locally:
+
+    python seed_data.py --contacts 2000000 --testimonials 5000
+    python seed_data.py --contacts 500000 --status-weights new=70,in_progress=20,resolved=10 --days 730
 """
+import argparse
 import asyncio
-import os
+import itertools
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Dict, Iterable, Iterator
 from dotenv import load_dotenv
 
 # Load environment variables
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-from database import connect_to_mongo
-from models import SchoolTestimonial, SchoolStats
+from pymongo.errors import BulkWriteError
+
+from database import close_mongo_connection, get_database
+from models import ContactStatus, SchoolTestimonial, SchoolStats
 
 # Initial testimonials data (from frontend mock data)
 INITIAL_TESTIMONIALS = [
@@ -63,7 +77,7 @@ INITIAL_TESTIMONIALS = [
 async def seed_testimonials():
     """Seed initial testimonials"""
     print("Seeding testimonials...")
-    db = await connect_to_mongo()
+    db = await get_database()
     
     # Check if testimonials already exist
     existing_count = await db.testimonials.count_documents({})
@@ -75,7 +89,7 @@ async def seed_testimonials():
     testimonials = []
     for testimonial_data in INITIAL_TESTIMONIALS:
         testimonial = SchoolTestimonial(**testimonial_data)
-        testimonials.append(testimonial.dict())
+        testimonials.append(testimonial.model_dump())
     
     result = await db.testimonials.insert_many(testimonials)
     print(f"Inserted {len(result.inserted_ids)} testimonials")
@@ -83,7 +97,7 @@ async def seed_testimonials():
 async def seed_stats():
     """Seed initial school stats"""
     print("Seeding school statistics...")
-    db = await connect_to_mongo()
+    db = await get_database()
     
     # Check if stats already exist
     existing_stats = await db.school_stats.find_one()
@@ -99,16 +113,180 @@ async def seed_stats():
         average_satisfaction=4.8
     )
     
-    await db.school_stats.insert_one(stats.dict())
+    # average_rating is derived from the counters when stats are read
+    await db.school_stats.insert_one(stats.model_dump(exclude={"average_rating"}))
     print("Inserted initial school statistics")
 
+# Synthetic data building blocks
+FIRST_NAMES = [
+    "Aisha", "Ben", "Carla", "Dmitri", "Elena", "Farid", "Grace", "Hiro", "Isabel", "Jamal",
+    "Kate", "Luis", "Maya", "Noah", "Olga", "Priya", "Quinn", "Rosa", "Sam", "Tariq",
+    "Uma", "Victor", "Wen", "Ximena", "Yusuf", "Zoe"
+]
+LAST_NAMES = [
+    "Adams", "Baker", "Chen", "Diaz", "Evans", "Fischer", "Garcia", "Hughes", "Ivanova", "Johnson",
+    "Kim", "Lopez", "Martin", "Nguyen", "Okafor", "Patel", "Rossi", "Smith", "Tanaka", "Walker"
+]
+SCHOOL_PREFIXES = [
+    "Greenwood", "Lincoln", "Roosevelt", "Westfield", "Maplewood", "Central", "Riverside",
+    "Oak Ridge", "Hillcrest", "Lakeview", "Sunnyvale", "Cedar Park", "Pine Valley", "Brookside"
+]
+SCHOOL_SUFFIXES = ["Elementary", "Middle School", "High School", "Academy", "Primary School", "Prep"]
+EMAIL_DOMAINS = ["gmail.com", "outlook.com", "yahoo.com", "school.edu", "district.org"]
+MESSAGES = [
+    "We'd like a demo of the {feature} module for our staff of {count} teachers.",
+    "Can you share pricing for {count} students? We're mostly interested in {feature}.",
+    "Our district is evaluating platforms for {feature}. Could someone call me back?",
+    "We currently track {feature} in spreadsheets and want to move {count} students over.",
+    "Does the {feature} feature integrate with our existing SIS? We have about {count} users."
+]
+FEATURES = [
+    "attendance tracking", "gradebook", "parent messaging", "exam scheduling",
+    "timetabling", "fee management", "report cards", "analytics"
+]
+TESTIMONIAL_ROLES = ["Principal", "Vice Principal", "Teacher", "IT Administrator", "Parent", "Guidance Counselor"]
+DEFAULT_STATUS_WEIGHTS = {"new": 50, "in_progress": 20, "resolved": 30}
+
+def parse_status_weights(value: str) -> Dict[str, float]:
+    """Parse new=50,in_progress=20,resolved=30 into status weights"""
+    weights = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        weights[ContactStatus(name.strip()).value] = float(weight)
+    return weights
+
+def random_timestamp(rng: random.Random, now: datetime, days: int, recent_bias: float) -> datetime:
+    """A time in the last `days` days; recent_bias > 0 skews toward now"""
+    age = rng.random() ** (1 + recent_bias)
+    return now - timedelta(seconds=age * days * 86400)
+
+def generate_contacts(
+    count: int,
+    status_weights: Dict[str, float] = None,
+    days: int = 365,
+    recent_bias: float = 1.0,
+    seed: int = None
+) -> Iterator[dict]:
+    """Lazily yield stored contact documents"""
+    rng = random.Random(seed)
+    weights = status_weights or DEFAULT_STATUS_WEIGHTS
+    statuses, cumulative = list(weights), list(itertools.accumulate(weights.values()))
+    schools = [f"{prefix} {suffix}" for prefix in SCHOOL_PREFIXES for suffix in SCHOOL_SUFFIXES]
+    now = datetime.utcnow()
+    
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        status = rng.choices(statuses, cum_weights=cumulative)[0]
+        created_at = random_timestamp(rng, now, days, recent_bias)
+        updated_at = created_at
+        if status != ContactStatus.NEW.value:
+            updated_at = min(now, created_at + timedelta(hours=rng.uniform(1, 240)))
+        yield {
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "name": f"{first} {last}",
+            "email": f"{first}.{last}{i}@{rng.choice(EMAIL_DOMAINS)}".lower(),
+            "school": rng.choice(schools) if rng.random() < 0.9 else None,
+            "phone": f"+1 ({rng.randint(200, 999)}) {rng.randint(200, 999)}-{rng.randint(0, 9999):04d}" if rng.random() < 0.6 else None,
+            "message": rng.choice(MESSAGES).format(feature=rng.choice(FEATURES), count=rng.randint(10, 5000)),
+            "status": status,
+            "created_at": created_at,
+            "updated_at": updated_at
+        }
+
+def generate_testimonials(count: int, days: int = 365, active_ratio: float = 0.8, seed: int = None) -> Iterator[dict]:
+    """Lazily yield stored testimonial documents"""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    
+    for _ in range(count):
+        template = rng.choice(INITIAL_TESTIMONIALS)
+        created_at = random_timestamp(rng, now, days, 0.0)
+        yield {
+            "id": str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            "text": template["text"],
+            "author": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "role": rng.choice(TESTIMONIAL_ROLES),
+            "school": f"{rng.choice(SCHOOL_PREFIXES)} {rng.choice(SCHOOL_SUFFIXES)}",
+            "rating": rng.choices([5, 4, 3, 2, 1], weights=[60, 25, 10, 3, 2])[0],
+            "is_active": rng.random() < active_ratio,
+            "created_at": created_at,
+            "updated_at": created_at
+        }
+
+async def bulk_insert(collection, documents: Iterable[dict], batch_size: int = 5000, concurrency: int = 4) -> int:
+    """Insert a document stream with up to `concurrency` unordered insert_many batches in flight"""
+    inserted = 0
+    pending = set()
+    documents = iter(documents)
+    
+    def done(task: asyncio.Task) -> int:
+        try:
+            return len(task.result().inserted_ids)
+        except BulkWriteError as e:
+            return e.details.get("nInserted", 0)
+    
+    while True:
+        batch = list(itertools.islice(documents, batch_size))
+        if batch:
+            pending.add(asyncio.ensure_future(collection.insert_many(batch, ordered=False)))
+        if len(pending) >= concurrency or (not batch and pending):
+            finished, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            inserted += sum(done(task) for task in finished)
+        if not batch and not pending:
+            return inserted
+
+async def load_synthetic(args):
+    """Generate and load synthetic contacts and testimonials"""
+    db = await get_database()
+    
+    for name, collection, documents in (
+        ("contacts", db.contact_submissions, generate_contacts(
+            args.contacts, args.status_weights, args.days, args.recent_bias, args.seed)),
+        ("testimonials", db.testimonials, generate_testimonials(args.testimonials, args.days, seed=args.seed)),
+    ):
+        total = args.contacts if name == "contacts" else args.testimonials
+        if not total:
+            continue
+        print(f"Generating {total} {name}...")
+        started = time.perf_counter()
+        inserted = await bulk_insert(collection, documents, args.batch_size, args.concurrency)
+        elapsed = time.perf_counter() - started
+        print(f"Inserted {inserted} {name} in {elapsed:.1f}s ({inserted / elapsed:,.0f} docs/s)")
+
+async def rebuild_derived():
+    """Rebuild the stats counters and school lookup from the seeded collections"""
+    from counters import recompute_counters
+    from search import rebuild_school_lookup
+    print("Recomputing stats counters and school lookup...")
+    await recompute_counters()
+    await rebuild_school_lookup()
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--contacts", type=int, default=0, help="Synthetic contact submissions to generate")
+    parser.add_argument("--testimonials", type=int, default=0, help="Synthetic testimonials to generate")
+    parser.add_argument("--status-weights", type=parse_status_weights, default=None,
+                        help="Relative status mix, e.g. new=50,in_progress=20,resolved=30")
+    parser.add_argument("--days", type=int, default=365, help="Spread created_at over this many days")
+    parser.add_argument("--recent-bias", type=float, default=1.0,
+                        help="0 spreads dates evenly; higher values put more rows near today")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=4, help="insert_many batches in flight")
+    parser.add_argument("--seed", type=int, default=None, help="Random seed for reproducible data")
+    return parser.parse_args()
+
 async def main():
     """Main seeding function"""
+    args = parse_args()
     print("Starting database seeding...")
     
     try:
         await seed_testimonials()
         await seed_stats()
+        if args.contacts or args.testimonials:
+            await load_synthetic(args)
+        # Seeded rows bypass the write paths, so rebuild what they maintain
+        await rebuild_derived()
         print("Database seeding completed successfully!")
         
     except Exception as e:
@@ -116,8 +294,8 @@ async def main():
         raise
     
     finally:
-        # Close connection (if using global client)
+        await close_mongo_connection()
         print("Seeding finished.")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
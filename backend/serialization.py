@@ -0,0 +1,65 @@
+"""
+Fast JSON serialization for API responses
+
+Uses orjson when it is installed and falls back to the standard library.
+"""
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from config import env_bool
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# Serialize stored documents straight to JSON instead of rebuilding models
+TRUSTED_DB_READS = env_bool("TRUSTED_DB_READS", True)
+
+
+def _default(value: Any) -> Any:
+    """Encode the types that appear in our documents and models"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def model_from_db(model: type, document: dict) -> BaseModel:
+    """Wrap a stored document in a model, validating only when reads are untrusted"""
+    if TRUSTED_DB_READS:
+        return model.model_construct(**document)
+    return model(**document)
+
+
+def dumps(value: Any) -> bytes:
+    """Serialize a value to compact UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(value, default=_default, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with dumps; accepts datetimes, enums and models"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def json_response(value: Any, **kwargs) -> Response:
+    """Build a JSON response without FastAPI's encoder pass"""
+    return FastJSONResponse(value, **kwargs)
+
+
+def api_envelope(data: Any = None, message: str = None) -> dict:
+    """Successful APIResponse envelope as a plain dict"""
+    return {"success": True, "message": message, "data": data, "error": None}
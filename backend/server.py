@@ -6,14 +6,25 @@ import logging
 from pathlib import Path
 from contextlib import asynccontextmanager
 
+# Load environment before route modules read their settings
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
 # Import our new modules
-from database import connect_to_mongo, close_mongo_connection, setup_database
+from database import connect_to_mongo, close_mongo_connection, ping_mongo, setup_database
+from health import DB_SETUP_ON_STARTUP, mongo_probe, startup
+from write_behind import contact_write_queue, write_behind_enabled
+from idempotency import idempotency_write_queue
+from invalidation import invalidation_bus
+from serialization import FastJSONResponse
+from compression import CompressionMiddleware
+from metrics import MetricsMiddleware, metrics_endpoint
+from profiling import ProfilingMiddleware
 from routes.contacts import router as contacts_router
 from routes.testimonials import router as testimonials_router
 from routes.stats import router as stats_router
-
-ROOT_DIR = Path(__file__).parent
-load_dotenv(ROOT_DIR / '.env')
+from routes.system import router as system_router
+from routes.health import router as health_router, current_status
 
 # Configure logging
 logging.basicConfig(
@@ -22,23 +33,51 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+async def warm_up():
+    """Check MongoDB is reachable and create any missing indexes"""
+    await ping_mongo()
+    if DB_SETUP_ON_STARTUP != "off":
+        await setup_database()
+    logger.info("Database connected and setup complete")
+
 # Lifespan events for database connection
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting up School Management System API...")
     try:
-        await connect_to_mongo()
-        await setup_database()
-        logger.info("Database connected and setup complete")
+        # Creating the client does no I/O; the first round trip happens in warm_up
+        await connect_to_mongo(ping=False)
+        if DB_SETUP_ON_STARTUP == "blocking":
+            await startup.run(warm_up)
+        else:
+            # Serve (and answer liveness) right away; readiness flips once warm-up succeeds
+            startup.start(warm_up)
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
         raise
     
+    if write_behind_enabled():
+        contact_write_queue.start()
+        # Idempotent responses are stored in batches too, so submissions never wait on MongoDB writes
+        idempotency_write_queue.start()
+    
+    # Keep this worker's caches in step with writes handled elsewhere
+    invalidation_bus.start()
+    
+    # Health endpoints report this cached ping instead of querying per probe
+    mongo_probe.start()
+    
     yield
     
     # Shutdown
     logger.info("Shutting down...")
+    await startup.stop()
+    await mongo_probe.stop()
+    await invalidation_bus.stop()
+    # Flush queued submissions while the client is still open
+    await contact_write_queue.stop()
+    await idempotency_write_queue.stop()
     await close_mongo_connection()
 
 # Create the main app with lifespan
@@ -46,25 +85,44 @@ app = FastAPI(
     title="School Management System API",
     description="Backend API for EduManage School Management Platform",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
 
-# Health check endpoint
+# Health check endpoint (see /api/health/ready for details)
 @api_router.get("/")
 async def root():
-    return {"message": "School Management System API is running", "status": "healthy"}
+    status = current_status()
+    return {
+        "message": "School Management System API is running",
+        "status": "healthy" if status == "ok" else status
+    }
 
 # Include all route modules
 api_router.include_router(contacts_router)
 api_router.include_router(testimonials_router)
 api_router.include_router(stats_router)
+api_router.include_router(system_router)
+api_router.include_router(health_router)
 
 # Include the router in the main app
 app.include_router(api_router)
 
+# Prometheus scrape endpoint
+app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
+
+# Opt-in request profiling (PROFILE_SAMPLE_RATE / PROFILE_TOKEN)
+app.add_middleware(ProfilingMiddleware)
+
+# Compress large responses; cached payloads arrive already compressed
+app.add_middleware(CompressionMiddleware)
+
+# Per-route latency and status metrics, measured outside compression
+app.add_middleware(MetricsMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -0,0 +1,178 @@
+"""
+Write-behind buffering for high-volume inserts
+
+Documents are acknowledged once they are queued in memory. A background
+task flushes them to MongoDB with insert_many whenever a batch fills up
+or the flush interval passes.
+"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional
+
+from pymongo.errors import BulkWriteError
+
+from database import get_database
+from config import env_bool, env_float, env_int
+from counters import record_contacts_created
+from search import record_schools
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+class QueueFullError(Exception):
+    """Raised when the queue stays full longer than the put timeout"""
+
+
+class WriteBehindQueue:
+    """Bounded in-process queue flushed to one collection in batches"""
+
+    def __init__(
+        self,
+        collection_name: str,
+        max_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        put_timeout: float = 2.0,
+        max_retries: int = 3,
+        on_flush: Optional[Callable[[List[dict]], Awaitable[None]]] = None
+    ):
+        self.collection_name = collection_name
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.max_retries = max_retries
+        self.on_flush = on_flush
+        self.flushed = 0
+        self.dropped = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._closing
+
+    def start(self):
+        """Start the background flush task"""
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Write-behind queue started for {self.collection_name}")
+
+    async def put(self, document: dict):
+        """Queue a document, waiting up to put_timeout when the queue is full"""
+        if not self.running:
+            raise QueueFullError("Write-behind queue is not accepting documents")
+        try:
+            await asyncio.wait_for(self._queue.put(document), timeout=self.put_timeout)
+        except asyncio.TimeoutError:
+            raise QueueFullError(f"Write-behind queue for {self.collection_name} is full")
+
+    async def stop(self):
+        """Stop accepting documents and flush everything still queued"""
+        if self._task is None:
+            return
+        self._closing = True
+        if not self._task.done():
+            await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info(
+            f"Write-behind queue for {self.collection_name} drained "
+            f"({self.flushed} flushed, {self.dropped} dropped)"
+        )
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                # Keep the task alive; stop() waits for every queued document
+                logger.error(f"Write-behind flush to {self.collection_name} crashed: {str(e)}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _flush(self, batch: List[dict]):
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                db = await get_database()
+                await db[self.collection_name].insert_many(batch, ordered=False)
+            except BulkWriteError as e:
+                # insert_many set each _id, so after a failed attempt that wrote some
+                # rows, the retry reports those rows as duplicate keys: they are saved
+                failed = {
+                    error["index"] for error in e.details.get("writeErrors", [])
+                    if not (attempt > 1 and error.get("code") == DUPLICATE_KEY_ERROR)
+                }
+                if failed:
+                    # Rows that failed individually won't succeed on retry
+                    self.dropped += len(failed)
+                    logger.error(f"Write-behind flush to {self.collection_name} rejected {len(failed)} documents")
+                await self._flushed([doc for index, doc in enumerate(batch) if index not in failed])
+                return
+            except Exception as e:
+                logger.error(f"Write-behind flush to {self.collection_name} failed (attempt {attempt}): {str(e)}")
+                await asyncio.sleep(min(2 ** attempt * 0.1, 2.0))
+                continue
+            await self._flushed(batch)
+            return
+        self.dropped += len(batch)
+        logger.error(f"Dropped {len(batch)} documents for {self.collection_name} after {self.max_retries} attempts")
+
+    async def _flushed(self, documents: List[dict]):
+        self.flushed += len(documents)
+        if self.on_flush is not None and documents:
+            await self.on_flush(documents)
+
+    def snapshot(self) -> dict:
+        """Queue depth and flush counters"""
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "max_size": self.max_size,
+            "flushed": self.flushed,
+            "dropped": self.dropped
+        }
+
+
+async def contacts_flushed(documents: List[dict]):
+    """Update counters and lookup tables for flushed contact submissions"""
+    await asyncio.gather(
+        record_contacts_created(len(documents)),
+        record_schools(doc.get("school") for doc in documents)
+    )
+
+
+# Contact form submissions, enabled with CONTACT_WRITE_BEHIND=true
+contact_write_queue = WriteBehindQueue(
+    "contact_submissions",
+    max_size=env_int("CONTACT_WRITE_BEHIND_MAX_SIZE", 10000),
+    batch_size=env_int("CONTACT_WRITE_BEHIND_BATCH_SIZE", 500),
+    flush_interval=env_float("CONTACT_WRITE_BEHIND_FLUSH_INTERVAL", 0.5),
+    put_timeout=env_float("CONTACT_WRITE_BEHIND_PUT_TIMEOUT", 2.0),
+    on_flush=contacts_flushed
+)
+
+
+def write_behind_enabled() -> bool:
+    """Whether contact submissions should use the write-behind queue"""
+    return env_bool("CONTACT_WRITE_BEHIND", False)
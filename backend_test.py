@@ -11,7 +11,7 @@ import os
 from datetime import datetime
 
 # Get the backend URL from environment
-BACKEND_URL = "https://learnlink-portal.preview.emergentagent.com/api"
+BACKEND_URL = os.environ.get("BACKEND_URL", "https://learnlink-portal.preview.emergentagent.com/api")
 
 class SchoolAPITester:
     def __init__(self, base_url):
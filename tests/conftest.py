@@ -0,0 +1,46 @@
+"""
+Shared fixtures: the backend modules on sys.path and an in-memory MongoDB
+
+Tests run against mongomock-motor, so they need no MongoDB server. Route
+tests drive the app through httpx without running its lifespan, so no
+background tasks (warm-up, probes, invalidation) are started.
+"""
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+# Modules read settings at import; load_dotenv never overrides these
+os.environ["RATE_LIMIT_ENABLED"] = "false"
+os.environ["CACHE_INVALIDATION_MODE"] = "off"
+os.environ["CONTACT_WRITE_BEHIND"] = "false"
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+
+@pytest.fixture
+def db():
+    """A fresh in-memory database installed as the app's database"""
+    import database
+    from cache import caches
+    from idempotency import idempotency_store
+
+    client = mongomock_motor.AsyncMongoMockClient()
+    database.client = client
+    database.database = database.read_database = client["school_cms_test"]
+    idempotency_store.clear()
+    idempotency_store._pending.clear()
+    for cache in caches.values():
+        cache.invalidate()
+    yield database.database
+    database.client = database.database = database.read_database = None
+
+
+@pytest.fixture
+def app(db):
+    from server import app
+    return app
@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+
+from cache import CachedPayload, ResponseCache
+
+
+def counting_loader(bodies):
+    """Loader returning the next body on each call, with a call counter"""
+    calls = {"count": 0}
+
+    async def load():
+        calls["count"] += 1
+        await asyncio.sleep(0.01)
+        body = bodies[min(calls["count"], len(bodies)) - 1]
+        if isinstance(body, Exception):
+            raise body
+        return CachedPayload(body=body)
+
+    return load, calls
+
+
+def age(cache: ResponseCache, key, seconds: float):
+    """Make the cached entry for `key` look `seconds` older"""
+    cache._entries[key].created_at -= seconds
+
+
+def test_concurrent_misses_share_one_load():
+    async def scenario():
+        cache = ResponseCache("test_single_flight", ttl=60)
+        load, calls = counting_loader([b"one"])
+
+        payloads = await asyncio.gather(*(cache.get_or_load("key", load) for _ in range(10)))
+
+        assert calls["count"] == 1
+        assert {payload.body for payload in payloads} == {b"one"}
+        assert (cache.misses, cache.coalesced) == (1, 9)
+        assert (await cache.get_or_load("key", load)).body == b"one"
+        assert cache.hits == 1
+
+    asyncio.run(scenario())
+
+
+def test_expired_entry_is_served_stale_while_refreshing():
+    async def scenario():
+        cache = ResponseCache("test_stale", ttl=10, stale_ttl=100)
+        load, calls = counting_loader([b"old", b"new"])
+        await cache.get_or_load("key", load)
+        age(cache, "key", 20)
+
+        stale = await cache.get_or_load("key", load)
+        assert stale.body == b"old"
+        assert cache.freshness_headers("key", stale)["X-Cache-Status"] == "stale"
+
+        await asyncio.sleep(0.05)
+        fresh = await cache.get_or_load("key", load)
+        assert fresh.body == b"new"
+        assert calls["count"] == 2 and cache.stale_hits == 1
+
+    asyncio.run(scenario())
+
+
+def test_entry_past_the_stale_ttl_is_reloaded():
+    async def scenario():
+        cache = ResponseCache("test_hard_ttl", ttl=10, stale_ttl=100)
+        load, _ = counting_loader([b"old", b"new"])
+        await cache.get_or_load("key", load)
+        age(cache, "key", 200)
+
+        assert (await cache.get_or_load("key", load)).body == b"new"
+
+    asyncio.run(scenario())
+
+
+def test_failed_load_falls_back_to_the_last_good_payload():
+    async def scenario():
+        cache = ResponseCache("test_fallback", ttl=10, stale_ttl=100)
+        load, _ = counting_loader([b"good", RuntimeError("mongo down")])
+        await cache.get_or_load("key", load)
+        cache.invalidate()
+
+        assert (await cache.get_or_load("key", load)).body == b"good"
+        assert cache.stale_on_error == 1
+
+    asyncio.run(scenario())
+
+
+def test_failed_load_without_stale_ttl_raises():
+    async def scenario():
+        cache = ResponseCache("test_no_fallback", ttl=10)
+        load, _ = counting_loader([b"good", RuntimeError("mongo down")])
+        await cache.get_or_load("key", load)
+        cache.invalidate()
+
+        with pytest.raises(RuntimeError):
+            await cache.get_or_load("key", load)
+
+    asyncio.run(scenario())
+
+
+def test_load_racing_an_invalidation_is_not_cached():
+    async def scenario():
+        cache = ResponseCache("test_race", ttl=60)
+        started, release = asyncio.Event(), asyncio.Event()
+
+        async def slow_load():
+            started.set()
+            await release.wait()
+            return CachedPayload(body=b"before")
+
+        pending = asyncio.ensure_future(cache.get_or_load("key", slow_load))
+        await started.wait()
+        # A write lands while the load is still reading
+        cache.invalidate()
+        release.set()
+
+        assert (await pending).body == b"before"
+        assert cache.get("key") is None
+
+    asyncio.run(scenario())
+
+
+def test_max_entries_evicts_the_oldest_loads():
+    async def scenario():
+        cache = ResponseCache("test_bounded", ttl=60, max_entries=3)
+        for key in range(5):
+            load, _ = counting_loader([str(key).encode()])
+            await cache.get_or_load(key, load)
+
+        assert list(cache._entries) == [2, 3, 4]
+        assert cache.evictions == 2
+
+    asyncio.run(scenario())
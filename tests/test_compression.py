@@ -0,0 +1,69 @@
+import asyncio
+import gzip
+import zlib
+
+from compression import CompressionMiddleware
+
+ROWS = [b'{"name": "Parent %d", "school": "Riverside"}\n' % index for index in range(50)]
+
+
+def streaming_app(content_type: bytes, chunks):
+    async def app(scope, receive, send):
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", content_type), (b"content-length", b"999")]
+        })
+        for index, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": index < len(chunks) - 1})
+
+    return app
+
+
+def call(app, accept_encoding: bytes = b"gzip"):
+    """Run the middleware around `app` and return every message it sent"""
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", accept_encoding)]}
+    asyncio.run(CompressionMiddleware(app, minimum_size=64)(scope, None, send))
+    return messages
+
+
+def test_streamed_body_is_compressed_chunk_by_chunk():
+    messages = call(streaming_app(b"application/x-ndjson", ROWS))
+    start, bodies = messages[0], messages[1:]
+    headers = dict(start["headers"])
+
+    assert headers[b"content-encoding"] == b"gzip"
+    assert b"content-length" not in headers
+    assert len(bodies) == len(ROWS)
+    assert [body["more_body"] for body in bodies] == [True] * (len(ROWS) - 1) + [False]
+
+    # Every chunk is flushed, so a client can decode each row as it arrives
+    decoder = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    for row, body in zip(ROWS, bodies):
+        assert decoder.decompress(body["body"]) == row
+    assert gzip.decompress(b"".join(body["body"] for body in bodies)) == b"".join(ROWS)
+
+
+def test_small_single_body_is_left_uncompressed():
+    messages = call(streaming_app(b"application/json", [b'{"ok": true}']))
+
+    assert b"content-encoding" not in dict(messages[0]["headers"])
+    assert messages[1]["body"] == b'{"ok": true}'
+
+
+def test_uncompressible_types_pass_through():
+    messages = call(streaming_app(b"image/png", ROWS))
+
+    assert b"content-encoding" not in dict(messages[0]["headers"])
+    assert b"".join(message["body"] for message in messages[1:]) == b"".join(ROWS)
+
+
+def test_no_accepted_encoding_passes_through():
+    messages = call(streaming_app(b"application/x-ndjson", ROWS), accept_encoding=b"identity")
+
+    assert b"".join(message["body"] for message in messages[1:]) == b"".join(ROWS)
@@ -0,0 +1,213 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from routes.contacts import decode_contact_cursor, encode_contact_cursor
+from seed_data import generate_contacts
+
+
+def request(app, method: str, url: str, **kwargs) -> httpx.Response:
+    async def send():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.request(method, url, **kwargs)
+
+    return asyncio.run(send())
+
+
+def insert_contacts(db, documents):
+    asyncio.run(db.contact_submissions.insert_many(documents))
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2026, 3, 1, 12, 30, 15, 250000)
+
+    token = encode_contact_cursor(created_at, "contact-1")
+
+    assert "=" not in token
+    assert decode_contact_cursor(token) == (created_at, "contact-1")
+
+
+@pytest.mark.parametrize("token", ["not-a-cursor", "", "WzFd"])
+def test_invalid_cursor_is_a_bad_request(token):
+    with pytest.raises(HTTPException) as error:
+        decode_contact_cursor(token)
+    assert error.value.status_code == 400
+
+
+def test_keyset_pages_cover_every_contact_once(db, app):
+    contacts = list(generate_contacts(11, seed=3))
+    # Share a timestamp so the id tiebreaker decides the order
+    for contact in contacts[:4]:
+        contact["created_at"] = contacts[0]["created_at"]
+    insert_contacts(db, contacts)
+
+    seen, after = [], None
+    while True:
+        params = {"cursor": "true", "limit": 4, **({"after": after} if after else {})}
+        page = request(app, "GET", "/api/contacts/", params=params).json()["data"]
+        seen.extend(contact["id"] for contact in page["submissions"])
+        after = page["pagination"]["next_cursor"]
+        assert page["pagination"]["has_more"] == (after is not None)
+        if after is None:
+            break
+
+    expected = sorted(contacts, key=lambda contact: (contact["created_at"], contact["id"]), reverse=True)
+    assert seen == [contact["id"] for contact in expected]
+
+
+def test_keyset_pages_respect_the_status_filter(db, app):
+    insert_contacts(db, list(generate_contacts(20, seed=4)))
+
+    page = request(app, "GET", "/api/contacts/", params={"cursor": "true", "status": "resolved"}).json()["data"]
+
+    assert page["submissions"]
+    assert {contact["status"] for contact in page["submissions"]} == {"resolved"}
+    assert page["pagination"]["total"] == len(page["submissions"])
+
+
+def seed_statuses(db, statuses):
+    now = datetime.utcnow()
+    contacts = list(generate_contacts(len(statuses), seed=5))
+    for index, (contact, status) in enumerate(zip(contacts, statuses)):
+        contact["status"] = status
+        contact["created_at"] = now - timedelta(minutes=index)
+    insert_contacts(db, contacts)
+    return [contact["id"] for contact in contacts]
+
+
+def bulk_status(app, body) -> httpx.Response:
+    return request(app, "PATCH", "/api/contacts/status", json=body)
+
+
+def test_bulk_status_by_ids_counts_only_the_selection(db, app):
+    ids = seed_statuses(db, ["new", "new", "in_progress", "resolved", "resolved", "new"])
+
+    data = bulk_status(app, {"ids": ids[:4], "status": "resolved"}).json()["data"]
+
+    assert data["matched"] == 4
+    assert data["modified"] == 3
+    assert data["by_previous_status"] == {"new": 2, "in_progress": 1}
+
+
+def test_bulk_status_by_filter_does_not_count_other_rows_at_the_target(db, app):
+    seed_statuses(db, ["new", "new", "resolved", "resolved", "resolved"])
+
+    data = bulk_status(app, {"filter": {"status": "new"}, "status": "resolved"}).json()["data"]
+
+    assert (data["matched"], data["modified"]) == (2, 2)
+    assert asyncio.run(db.contact_submissions.count_documents({"status": "resolved"})) == 5
+
+
+def test_bulk_status_filter_on_the_target_matches_without_modifying(db, app):
+    seed_statuses(db, ["new", "resolved", "resolved"])
+
+    data = bulk_status(app, {"filter": {"status": "resolved"}, "status": "resolved"}).json()["data"]
+
+    assert (data["matched"], data["modified"]) == (2, 0)
+
+
+def test_bulk_status_moves_the_stats_counters(db, app):
+    from counters import recompute_counters
+
+    ids = seed_statuses(db, ["new", "new", "in_progress", "resolved"])
+    asyncio.run(recompute_counters())
+
+    bulk_status(app, {"ids": ids, "status": "resolved"})
+
+    stats = asyncio.run(db.school_stats.find_one({}))
+    assert stats["contacts_by_status"] == {"new": 0, "in_progress": 0, "resolved": 4}
+
+
+@pytest.mark.parametrize("body", [
+    {"status": "resolved", "filter": {}},
+    {"status": "resolved"},
+    {"status": "resolved", "ids": ["a"], "filter": {"status": "new"}},
+])
+def test_bulk_status_rejects_an_ambiguous_or_empty_selection(db, app, body):
+    seed_statuses(db, ["new"])
+
+    assert bulk_status(app, body).status_code == 422
+    assert asyncio.run(db.contact_submissions.count_documents({"status": "new"})) == 1
+
+
+@pytest.mark.parametrize("trusted", [True, False])
+def test_search_score_is_not_serialized(monkeypatch, trusted):
+    from routes import contacts
+
+    monkeypatch.setattr(contacts, "TRUSTED_DB_READS", trusted)
+    submission = next(generate_contacts(1, seed=6))
+    submission["score"] = 1.5
+
+    response = contacts.contact_page_response([submission], {"page": 1})
+
+    body = response.body if trusted else response.model_dump_json().encode()
+    assert b"score" not in body
+
+
+def bulk_contacts(count: int):
+    return [
+        {"name": f"Parent {index}", "email": f"parent{index}@example.com", "message": "Please send the prospectus"}
+        for index in range(count)
+    ]
+
+
+def test_bulk_json_reports_per_row_errors(db, app):
+    rows = [*bulk_contacts(2), {"name": "No email", "message": "Hello there"}, "not an object"]
+
+    data = request(app, "POST", "/api/contacts/bulk", json=rows).json()["data"]
+
+    assert (data["received"], data["inserted"], data["failed"]) == (4, 2, 2)
+    assert [error["index"] for error in data["errors"]] == [2, 3]
+    assert asyncio.run(db.contact_submissions.count_documents({})) == 2
+
+
+def test_bulk_ndjson_reports_unparseable_lines(db, app):
+    lines = [json.dumps(row) for row in bulk_contacts(2)]
+    body = "\n".join([lines[0], "{not json", "", lines[1]])
+
+    data = request(
+        app, "POST", "/api/contacts/bulk", content=body, headers={"content-type": "application/x-ndjson"}
+    ).json()["data"]
+
+    assert (data["received"], data["inserted"]) == (3, 2)
+    assert data["errors"] == [{"index": 1, "error": "Invalid JSON"}]
+
+
+def test_bulk_rejects_a_body_that_is_not_an_array(db, app):
+    assert request(app, "POST", "/api/contacts/bulk", json={"rows": []}).status_code == 400
+
+
+def test_bulk_over_the_row_limit_is_rejected_while_streaming(db, app, monkeypatch):
+    from routes import contacts
+
+    monkeypatch.setattr(contacts, "BULK_MAX_ROWS", 3)
+
+    async def ndjson():
+        for row in bulk_contacts(10):
+            yield (json.dumps(row) + "\n").encode()
+
+    response = request(
+        app, "POST", "/api/contacts/bulk", content=ndjson(), headers={"content-type": "application/x-ndjson"}
+    )
+
+    assert response.status_code == 413
+    assert asyncio.run(db.contact_submissions.count_documents({})) == 0
+
+
+def test_bulk_over_the_byte_limit_is_rejected(db, app, monkeypatch):
+    from routes import contacts
+
+    monkeypatch.setattr(contacts, "BULK_MAX_BYTES", 200)
+    body = json.dumps(bulk_contacts(5)).encode()
+
+    # Declared by Content-Length, and counted while streaming when it isn't
+    async def chunked():
+        for start in range(0, len(body), 64):
+            yield body[start:start + 64]
+
+    assert request(app, "POST", "/api/contacts/bulk", content=body).status_code == 413
+    assert request(app, "POST", "/api/contacts/bulk", content=chunked()).status_code == 413
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+import health
+from health import MongoProbe
+
+
+class FakePool:
+    def __init__(self, p99_wait_ms: float = 0.0):
+        self.p99_wait_ms = p99_wait_ms
+
+    def snapshot(self) -> dict:
+        return {"p99_wait_ms": self.p99_wait_ms}
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = FakePool()
+    monkeypatch.setattr(health, "pool_monitor", pool)
+    return pool
+
+
+def use_ping(monkeypatch, delay: float = 0.0, error: Exception = None):
+    async def ping_mongo():
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+
+    monkeypatch.setattr(health, "ping_mongo", ping_mongo)
+
+
+def checked_probe(**kwargs) -> MongoProbe:
+    probe = MongoProbe(interval=5, timeout=1, degraded_ping_ms=50, degraded_pool_wait_ms=100, **kwargs)
+    asyncio.run(probe.check())
+    return probe
+
+
+def test_never_checked_is_down(pool):
+    assert MongoProbe().status == "down"
+
+
+def test_fast_ping_and_idle_pool_is_ok(monkeypatch, pool):
+    use_ping(monkeypatch)
+
+    assert checked_probe().status == "ok"
+
+
+def test_slow_ping_is_degraded(monkeypatch, pool):
+    use_ping(monkeypatch, delay=0.1)
+
+    assert checked_probe().status == "degraded"
+
+
+def test_pool_wait_is_degraded(monkeypatch, pool):
+    use_ping(monkeypatch)
+    pool.p99_wait_ms = 250
+
+    assert checked_probe().status == "degraded"
+
+
+def test_failed_or_timed_out_ping_is_down(monkeypatch, pool):
+    use_ping(monkeypatch, error=ConnectionError("connection refused"))
+    probe = checked_probe()
+    assert (probe.status, probe.error, probe.failures) == ("down", "connection refused", 1)
+
+    use_ping(monkeypatch, delay=2)
+    probe = MongoProbe(timeout=0.01)
+    asyncio.run(probe.check())
+    assert (probe.status, probe.error) == ("down", "TimeoutError")
+
+
+def test_stale_result_is_down(monkeypatch, pool):
+    use_ping(monkeypatch)
+    probe = checked_probe()
+
+    # The probe loop stopped reporting more than three intervals ago
+    probe.checked_at -= probe.interval * 3 + probe.timeout + 1
+
+    assert probe.status == "down"
@@ -0,0 +1,189 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from idempotency import IDEMPOTENCY_COLLECTION, Claim, IdempotencyStore, digest
+
+RESPONSE = {"success": True, "data": {"id": "contact-1"}}
+
+
+def claims_for(body: str, key: str = "key-1"):
+    return [Claim(key=key, ttl=60, fingerprint=digest(body))]
+
+
+def test_completed_claim_is_replayed(db):
+    async def scenario():
+        store = IdempotencyStore()
+        claims = claims_for("body")
+        assert await store.claim(claims) is None
+        await store.complete(claims, RESPONSE)
+
+        assert await store.claim(claims) == RESPONSE
+        assert store.replayed == 1
+
+    asyncio.run(scenario())
+
+
+def test_replay_reaches_other_workers_through_mongo(db):
+    async def scenario():
+        claims = claims_for("body")
+        first = IdempotencyStore()
+        await first.claim(claims)
+        await first.complete(claims, RESPONSE)
+
+        # A second store has an empty LRU, like another worker
+        assert await IdempotencyStore().claim(claims) == RESPONSE
+
+    asyncio.run(scenario())
+
+
+def test_reused_key_with_different_body_is_rejected(db):
+    async def scenario():
+        store = IdempotencyStore()
+        await store.claim(claims_for("body"))
+        await store.complete(claims_for("body"), RESPONSE)
+
+        for checked in (store, IdempotencyStore()):
+            with pytest.raises(HTTPException) as error:
+                await checked.claim(claims_for("another body"))
+            assert error.value.status_code == 422
+
+    asyncio.run(scenario())
+
+
+def test_claim_still_in_progress_elsewhere_is_a_conflict(db):
+    async def scenario():
+        claims = claims_for("body")
+        await IdempotencyStore().claim(claims)
+
+        with pytest.raises(HTTPException) as error:
+            await IdempotencyStore().claim(claims)
+        assert error.value.status_code == 409
+        assert error.value.headers["Retry-After"] == "1"
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_duplicate_waits_for_the_first_request(db):
+    async def scenario():
+        store = IdempotencyStore()
+        claims = claims_for("body")
+        assert await store.claim(claims) is None
+
+        duplicate = asyncio.create_task(store.claim(claims))
+        await asyncio.sleep(0)
+        assert not duplicate.done()
+
+        await store.complete(claims, RESPONSE)
+        assert await duplicate == RESPONSE
+
+    asyncio.run(scenario())
+
+
+def test_released_claim_can_be_retried(db):
+    async def scenario():
+        claims = claims_for("body")
+        store = IdempotencyStore()
+        await store.claim(claims)
+        await store.release(claims)
+
+        assert await db[IDEMPOTENCY_COLLECTION].count_documents({}) == 0
+        assert await IdempotencyStore().claim(claims) is None
+
+    asyncio.run(scenario())
+
+
+def test_failed_second_claim_releases_the_first(db):
+    async def scenario():
+        held = [Claim(key="content", ttl=60)]
+        await IdempotencyStore().claim(held)
+
+        store = IdempotencyStore()
+        with pytest.raises(HTTPException):
+            await store.claim([Claim(key="key-1", ttl=60), *held])
+        assert await db[IDEMPOTENCY_COLLECTION].find_one({"_id": "key-1"}) is None
+
+    asyncio.run(scenario())
+
+
+def test_expired_claim_is_taken_over(db):
+    async def scenario():
+        past = datetime.utcnow() - timedelta(seconds=1)
+        await db[IDEMPOTENCY_COLLECTION].insert_one({
+            "_id": "key-1",
+            "fingerprint": None,
+            "response": RESPONSE,
+            "created_at": past - timedelta(seconds=60),
+            "expires_at": past
+        })
+
+        assert await IdempotencyStore().claim(claims_for("body")) is None
+
+    asyncio.run(scenario())
+
+
+def test_claim_abandoned_past_its_lease_is_taken_over(db):
+    async def scenario():
+        now = datetime.utcnow()
+        await db[IDEMPOTENCY_COLLECTION].insert_one({
+            "_id": "key-1",
+            "fingerprint": digest("body"),
+            "response": None,
+            "created_at": now - timedelta(seconds=60),
+            "pending_until": now - timedelta(seconds=1),
+            "expires_at": now + timedelta(hours=1)
+        })
+
+        store = IdempotencyStore()
+        assert await store.lookup(claims_for("body")) is None
+        assert await store.claim(claims_for("body")) is None
+        stored = await db[IDEMPOTENCY_COLLECTION].find_one({"_id": "key-1"})
+        assert stored["pending_until"] > now
+
+    asyncio.run(scenario())
+
+
+def test_lookup_replays_without_writing(db):
+    async def scenario():
+        claims = claims_for("body")
+        first = IdempotencyStore()
+        assert await first.lookup(claims) is None
+        assert await db[IDEMPOTENCY_COLLECTION].count_documents({}) == 0
+
+        await first.claim(claims)
+        await first.complete(claims, RESPONSE)
+        assert await IdempotencyStore().lookup(claims) == RESPONSE
+
+    asyncio.run(scenario())
+
+
+def test_rate_limited_submission_writes_no_claims(db, app, monkeypatch):
+    import httpx
+    import ratelimit
+
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_CLIENT_IP", "client")
+    monkeypatch.setattr(ratelimit.contact_ip_limiter, "backend", ratelimit.MemoryRateLimitBackend())
+    monkeypatch.setattr(ratelimit.contact_ip_limiter, "burst", 1)
+    from idempotency import idempotency_store
+    claimed = []
+    claim = idempotency_store.claim
+    monkeypatch.setattr(idempotency_store, "claim", lambda claims: claimed.append(claims) or claim(claims))
+    body = {"name": "Ann", "email": "ann@example.com", "message": "Please call me back"}
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            assert (await client.post("/api/contacts/", json=body)).status_code == 200
+            assert len(claimed) == 1
+
+            response = await client.post("/api/contacts/", json={**body, "message": "Another message"})
+            assert response.status_code == 429
+            assert len(claimed) == 1
+
+            # A retry of the accepted submission is still replayed while limited
+            replay = await client.post("/api/contacts/", json=body)
+            assert replay.headers["Idempotent-Replayed"] == "true"
+
+    asyncio.run(scenario())
@@ -0,0 +1,161 @@
+import asyncio
+from datetime import datetime
+
+import mongomock
+from pymongo.errors import AutoReconnect, OperationFailure
+
+from cache import CachedPayload, ResponseCache
+from counters import COLLECTION_VERSIONS, NON_COUNTER_CHANGES, bump_collection_version
+from invalidation import InvalidationBus
+
+
+def cached(name: str) -> ResponseCache:
+    cache = ResponseCache(name, ttl=60)
+    cache._entries["key"] = CachedPayload(body=b"cached")
+    return cache
+
+
+def event(collection: str, operation: str = "update", document_id=None) -> dict:
+    return {"ns": {"coll": collection}, "operationType": operation, "documentKey": {"_id": document_id}}
+
+
+def test_non_counter_changes_skips_counter_only_updates():
+    events = mongomock.MongoClient().db.events
+    events.insert_many([
+        {"name": "counters", "operationType": "update", "updateDescription": {
+            "updatedFields": {"contacts_total": 3, "contacts_by_status.new": 2}, "removedFields": []
+        }},
+        {"name": "mixed", "operationType": "update", "updateDescription": {
+            "updatedFields": {"contacts_total": 3, "total_schools": 9}, "removedFields": []
+        }},
+        {"name": "removed", "operationType": "update", "updateDescription": {
+            "updatedFields": {}, "removedFields": ["total_schools"]
+        }},
+        {"name": "insert", "operationType": "insert"},
+        {"name": "replace", "operationType": "replace"},
+    ])
+
+    matched = [doc["name"] for doc in events.aggregate([{"$match": NON_COUNTER_CHANGES}])]
+
+    assert matched == ["mixed", "removed", "insert", "replace"]
+
+
+def test_pipeline_carries_each_watch_filter_to_the_server():
+    bus = InvalidationBus(mode="auto")
+    skip_inserts = {"operationType": {"$ne": "insert"}}
+    bus.watch("contact_submissions", cached("test_counts"), match=skip_inserts)
+    bus.watch("contact_submissions", cached("test_analytics"), match=skip_inserts)
+    bus.watch("versions", cached("test_feed"), document_id="feed")
+
+    match, project = bus._pipeline()
+
+    assert match == {"$match": {"$or": [
+        {"ns.coll": "contact_submissions", "operationType": {"$ne": "insert"}},
+        {"ns.coll": "versions", "documentKey._id": "feed"},
+    ]}}
+    assert "fullDocument" not in project["$project"]
+
+
+def test_event_only_evicts_watches_on_its_document():
+    bus = InvalidationBus(mode="auto")
+    feed, other = cached("test_feed_doc"), cached("test_other_doc")
+    bus.watch("versions", feed, document_id="feed")
+    bus.watch("versions", other, document_id="other")
+
+    bus._dispatch_event(event("versions", document_id="feed"))
+
+    assert feed.get("key") is None
+    assert other.get("key") is not None
+
+
+def test_polling_follows_the_version_instead_of_inserts(db):
+    async def scenario():
+        bus = InvalidationBus(mode="poll", poll_interval=0.01)
+        counts = cached("test_poll_counts")
+        bus.watch("contact_submissions", counts, match={"operationType": {"$ne": "insert"}}, poll_version=True)
+        await bump_collection_version("contact_submissions")
+        bus.start()
+        await asyncio.sleep(0.05)
+
+        await db.contact_submissions.insert_one({"id": "c1", "status": "new", "updated_at": datetime.utcnow()})
+        await asyncio.sleep(0.05)
+        assert counts.get("key") is not None
+
+        await bump_collection_version("contact_submissions")
+        await asyncio.sleep(0.05)
+        assert counts.get("key") is None
+        await bus.stop()
+
+    asyncio.run(scenario())
+    assert asyncio.run(db[COLLECTION_VERSIONS].find_one({"_id": "contact_submissions"}))["version"] == 2
+
+
+class NoChangeStreamDatabase:
+    """The test database, but every watch() fails the way `error` says"""
+
+    def __init__(self, db, error: Exception):
+        self.db = db
+        self.error = error
+        self.watch_calls = 0
+
+    def __getitem__(self, name):
+        return self.db[name]
+
+    def watch(self, pipeline, resume_after=None):
+        self.watch_calls += 1
+        raise self.error
+
+
+def use_database(monkeypatch, database):
+    import invalidation
+
+    async def get_database():
+        return database
+
+    monkeypatch.setattr(invalidation, "get_database", get_database)
+
+
+def test_auto_mode_falls_back_to_polling_without_change_streams(db, monkeypatch):
+    standalone = NoChangeStreamDatabase(db, OperationFailure("not a replica set", code=40573))
+    use_database(monkeypatch, standalone)
+
+    async def scenario():
+        bus = InvalidationBus(mode="auto", poll_interval=0.01)
+        feed = cached("test_fallback_feed")
+        bus.watch("testimonials", feed)
+        bus.start()
+        await asyncio.sleep(0.05)
+        assert bus.snapshot()["mode"] == "poll"
+
+        await db.testimonials.insert_one({"id": "t1", "updated_at": datetime.utcnow()})
+        await asyncio.sleep(0.05)
+        await bus.stop()
+        return feed
+
+    assert asyncio.run(scenario()).get("key") is None
+    assert standalone.watch_calls == 1
+
+
+def test_transient_errors_retry_the_change_stream(db, monkeypatch):
+    import invalidation
+
+    monkeypatch.setattr(invalidation, "INVALIDATION_RETRY_DELAY", 0.01)
+    flaky = NoChangeStreamDatabase(db, AutoReconnect("primary stepped down"))
+    use_database(monkeypatch, flaky)
+
+    async def scenario():
+        bus = InvalidationBus(mode="auto", poll_interval=0.01)
+        feed = cached("test_retry_feed")
+        bus.watch("testimonials", feed)
+        bus.start()
+        await asyncio.sleep(0.05)
+        snapshot = bus.snapshot()
+        await bus.stop()
+        return feed, snapshot
+
+    feed, snapshot = asyncio.run(scenario())
+    assert snapshot["mode"] == "starting"
+    assert snapshot["last_error"] == "primary stepped down"
+    assert flaky.watch_calls >= 2
+    # Events may have been missed, so every watched cache was dropped
+    assert feed.get("key") is None
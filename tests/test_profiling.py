@@ -0,0 +1,58 @@
+import asyncio
+import threading
+
+import httpx
+from fastapi import FastAPI
+
+import profiling
+from profiling import ProfilingMiddleware, TaskSampler
+
+
+def profiled_app(monkeypatch, tmp_path) -> ProfilingMiddleware:
+    monkeypatch.setattr(profiling, "PROFILE_TOKEN", "secret")
+    monkeypatch.setattr(profiling, "PROFILE_DIR", tmp_path)
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow():
+        await asyncio.sleep(0.02)
+        return {"ok": True}
+
+    return ProfilingMiddleware(app)
+
+
+def get(app, mode: str) -> httpx.Response:
+    async def send():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get("/slow", headers={"X-Profile": mode, "X-Profile-Token": "secret"})
+
+    return asyncio.run(send())
+
+
+def test_inline_profile_replaces_the_body(monkeypatch, tmp_path):
+    response = get(profiled_app(monkeypatch, tmp_path), "inline")
+
+    assert response.headers["x-profile-status"] == "200"
+    assert int(response.headers["x-profile-samples"]) > 0
+    assert "slow (test_profiling.py" in response.text
+
+
+def test_saved_profile_is_written_off_the_event_loop(monkeypatch, tmp_path):
+    threads = {}
+    stop, save = TaskSampler.stop, ProfilingMiddleware._save
+
+    def record(name, call):
+        def wrapped(*args):
+            threads[name] = threading.current_thread()
+            return call(*args)
+        return wrapped
+
+    monkeypatch.setattr(TaskSampler, "stop", record("stop", stop))
+    monkeypatch.setattr(ProfilingMiddleware, "_save", staticmethod(record("save", save)))
+
+    response = get(profiled_app(monkeypatch, tmp_path), "save")
+
+    assert response.json() == {"ok": True}
+    assert [path.suffix for path in tmp_path.iterdir()] == [".folded"]
+    assert threading.main_thread() not in threads.values()
+    assert set(threads) == {"stop", "save"}
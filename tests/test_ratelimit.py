@@ -0,0 +1,135 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException, Request
+
+import ratelimit
+from ratelimit import MemoryRateLimitBackend, RateLimiter, TokenBucket, client_ip
+
+
+class FakeClock:
+    """Stands in for time.monotonic
+
+    Starts ahead of the real clock: buckets created by the backend take
+    their first timestamp from the real one, and must never look newer.
+    """
+
+    def __init__(self):
+        self.now = time.monotonic() + 3600
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", clock)
+    return clock
+
+
+def test_bucket_spends_its_burst_then_reports_the_wait(clock):
+    bucket = TokenBucket(tokens=3, updated_at=clock.now)
+
+    assert [bucket.take(rate=0.5, capacity=3) for _ in range(3)] == [0.0, 0.0, 0.0]
+    # One token at half a token per second is two seconds away
+    assert bucket.take(rate=0.5, capacity=3) == pytest.approx(2.0)
+
+
+def test_bucket_refills_at_its_rate(clock):
+    bucket = TokenBucket(tokens=0, updated_at=clock.now)
+
+    clock.now += 1.0
+    assert bucket.take(rate=0.5, capacity=3) == pytest.approx(1.0)
+    clock.now += 1.0
+    assert bucket.take(rate=0.5, capacity=3) == 0.0
+
+
+def test_bucket_refill_is_capped_at_capacity(clock):
+    bucket = TokenBucket(tokens=0, updated_at=clock.now)
+
+    clock.now += 3600
+    assert [bucket.take(rate=1, capacity=2) for _ in range(3)][-1] == pytest.approx(1.0)
+
+
+def test_limiter_raises_429_with_retry_after(clock, monkeypatch):
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_ENABLED", True)
+    limiter = RateLimiter("test", rate=0.1, burst=2)
+
+    async def scenario():
+        await limiter.check("client")
+        await limiter.check("client")
+        with pytest.raises(HTTPException) as error:
+            await limiter.check("client")
+        assert error.value.status_code == 429
+        assert error.value.headers["Retry-After"] == "10"
+        # Other clients have their own bucket
+        await limiter.check("other")
+
+    asyncio.run(scenario())
+    assert (limiter.allowed, limiter.limited) == (3, 1)
+
+
+def test_memory_backend_prunes_refilled_buckets(clock):
+    backend = MemoryRateLimitBackend(max_keys=2)
+
+    async def scenario():
+        await backend.consume("a", rate=1, capacity=1)
+        await backend.consume("b", rate=1, capacity=1)
+        clock.now += 5
+        await backend.consume("c", rate=1, capacity=1)
+
+    asyncio.run(scenario())
+    assert len(backend) == 1
+
+
+def fake_request(peer: str, forwarded: str = None):
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "headers": headers, "client": (peer, 50000)})
+
+
+@pytest.mark.parametrize("source, expected", [
+    ("off", None),
+    ("client", "10.0.0.1"),
+    ("forwarded", "203.0.113.7"),
+])
+def test_client_ip_comes_only_from_the_configured_source(monkeypatch, source, expected):
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_CLIENT_IP", source)
+
+    assert client_ip(fake_request("10.0.0.1", "203.0.113.7, 10.0.0.1")) == expected
+
+
+def test_forwarded_source_without_the_header_is_not_limited(monkeypatch):
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_CLIENT_IP", "forwarded")
+
+    # Falling back to the peer would put every visitor in the proxy's bucket
+    assert client_ip(fake_request("10.0.0.1")) is None
+
+
+def test_write_slot_covers_every_write_of_a_submission(db, app, monkeypatch):
+    import httpx
+    from idempotency import idempotency_store
+    from routes import contacts
+
+    slots = {}
+
+    def spy(name, write):
+        async def wrapped(*args, **kwargs):
+            slots[name] = ratelimit.write_admission.in_flight
+            return await write(*args, **kwargs)
+        return wrapped
+
+    monkeypatch.setattr(idempotency_store, "claim", spy("claim", idempotency_store.claim))
+    monkeypatch.setattr(idempotency_store, "complete", spy("complete", idempotency_store.complete))
+    monkeypatch.setattr(contacts, "record_contacts_created", spy("counters", contacts.record_contacts_created))
+    monkeypatch.setattr(contacts, "record_schools", spy("schools", contacts.record_schools))
+    body = {"name": "Ann", "email": "ann@example.com", "message": "Please call me back", "school": "Hill High"}
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            assert (await client.post("/api/contacts/", json=body)).status_code == 200
+
+    asyncio.run(scenario())
+    assert slots == {"claim": 1, "counters": 1, "schools": 1, "complete": 1}
+    assert ratelimit.write_admission.in_flight == 0
@@ -0,0 +1,34 @@
+import asyncio
+
+import httpx
+
+from routes import testimonials
+
+
+def get_feed(app, **headers) -> httpx.Response:
+    async def send():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get("/api/testimonials/", headers=headers)
+
+    return asyncio.run(send())
+
+
+def test_matching_etag_gets_a_304(db, app):
+    first = get_feed(app)
+    assert first.headers["ETag"] == testimonials.feed_etag(0, 6, True)
+
+    assert get_feed(app, **{"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+
+def test_feed_loaded_across_a_version_bump_is_not_tagged_or_cached(db, app, monkeypatch):
+    versions = iter([0, 1, 1, 1])
+
+    async def moving_version(collection):
+        return next(versions)
+
+    monkeypatch.setattr(testimonials, "collection_version", moving_version)
+
+    racing = get_feed(app)
+    assert racing.status_code == 200
+    assert "ETag" not in racing.headers
+    assert get_feed(app, **{"If-None-Match": "*"}).headers["ETag"] == testimonials.feed_etag(1, 6, True)
@@ -0,0 +1,106 @@
+import asyncio
+
+import pytest
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+import write_behind
+from write_behind import DUPLICATE_KEY_ERROR, WriteBehindQueue
+
+
+class ScriptedCollection:
+    """Collection whose insert_many raises the scripted errors in turn, then succeeds"""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+
+    async def insert_many(self, documents, ordered=True):
+        self.calls += 1
+        if self.outcomes:
+            raise self.outcomes.pop(0)
+
+
+def duplicate_keys(*indexes):
+    return BulkWriteError({
+        "writeErrors": [{"index": index, "code": DUPLICATE_KEY_ERROR, "errmsg": "E11000"} for index in indexes]
+    })
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    """Install a scripted collection as every collection write_behind sees"""
+    holder = {}
+
+    async def get_database():
+        return {"contact_submissions": holder["collection"]}
+
+    monkeypatch.setattr(write_behind, "get_database", get_database)
+
+    def install(*outcomes):
+        holder["collection"] = ScriptedCollection(outcomes)
+        return holder["collection"]
+
+    return install
+
+
+def recording_queue(**kwargs):
+    flushed = []
+
+    async def on_flush(documents):
+        flushed.extend(documents)
+
+    return WriteBehindQueue("contact_submissions", on_flush=on_flush, **kwargs), flushed
+
+
+def test_duplicates_on_a_retry_count_as_saved(collection):
+    # The first attempt wrote rows 0 and 2 before the connection dropped
+    scripted = collection(AutoReconnect("connection reset"), duplicate_keys(0, 2))
+    queue, flushed = recording_queue()
+    batch = [{"_id": index} for index in range(3)]
+
+    asyncio.run(queue._flush(batch))
+
+    assert scripted.calls == 2
+    assert (queue.flushed, queue.dropped) == (3, 0)
+    assert flushed == batch
+
+
+def test_duplicates_on_the_first_attempt_are_rejected(collection):
+    collection(duplicate_keys(1))
+    queue, flushed = recording_queue()
+    batch = [{"_id": index} for index in range(3)]
+
+    asyncio.run(queue._flush(batch))
+
+    assert (queue.flushed, queue.dropped) == (2, 1)
+    assert flushed == [batch[0], batch[2]]
+
+
+def test_batch_is_dropped_after_the_last_retry(collection):
+    scripted = collection(*(AutoReconnect("down") for _ in range(2)))
+    queue, flushed = recording_queue(max_retries=2)
+
+    asyncio.run(queue._flush([{"_id": 1}]))
+
+    assert scripted.calls == 2
+    assert (queue.flushed, queue.dropped) == (0, 1)
+    assert flushed == []
+
+
+def test_crashed_flush_still_lets_stop_drain(collection):
+    collection()
+
+    async def scenario():
+        async def on_flush(documents):
+            raise RuntimeError("counter update failed")
+
+        queue = WriteBehindQueue("contact_submissions", flush_interval=0.01, on_flush=on_flush)
+        queue.start()
+        await queue.put({"_id": 1})
+        await queue.put({"_id": 2})
+        await asyncio.wait_for(queue.stop(), timeout=1)
+        return queue
+
+    queue = asyncio.run(scenario())
+    assert queue.snapshot()["queued"] == 0
+    assert not queue.running